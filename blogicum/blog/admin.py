@@ -1,8 +1,10 @@
 # blog/admin.py
 from django.contrib import admin
+from django.contrib.auth.admin import UserAdmin
 
 # Из модуля models импортируем модель Category...
-from .models import Category, Comment, Location, Post
+from .deletion import mark_posts_deleted, schedule_users_deletion
+from .models import Category, Comment, Location, Post, User
 
 # Этот вариант сработает для всех моделей приложения.
 admin.site.empty_value_display = 'Не задано'
@@ -11,4 +13,34 @@ admin.site.empty_value_display = 'Не задано'
 admin.site.register(Category)
 admin.site.register(Comment)
 admin.site.register(Location)
-admin.site.register(Post)
+
+
+class ScheduledDeletionAdmin(admin.ModelAdmin):
+    """Удаление только ставит отметку; строки удалит purge_deleted.
+
+    Страница подтверждения не собирает связанные объекты: у автора
+    их могут быть десятки тысяч.
+    """
+
+    def get_deleted_objects(self, objs, request):
+        return [str(obj) for obj in objs], {}, set(), []
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self.model.objects.filter(pk=obj.pk))
+
+
+@admin.register(Post)
+class PostAdmin(ScheduledDeletionAdmin):
+
+    def delete_queryset(self, request, queryset):
+        mark_posts_deleted(queryset)
+
+
+class BlogUserAdmin(ScheduledDeletionAdmin, UserAdmin):
+
+    def delete_queryset(self, request, queryset):
+        schedule_users_deletion(queryset)
+
+
+admin.site.unregister(User)
+admin.site.register(User, BlogUserAdmin)
@@ -0,0 +1,234 @@
+# blog/archive.py
+"""Перенос старых публикаций с комментариями в архив и обратно.
+
+Архивные таблицы лежат в базе BLOG_ARCHIVE_DATABASE (см.
+blog.routers.ArchiveRouter). Страницы публикации и профиля
+показывают архивные публикации так же, как обычные: они
+превращаются в несохранённые экземпляры Post.
+"""
+from contextlib import contextmanager
+
+from django.db import router, transaction
+from django.db.models import Count, Q
+from django.http import Http404
+from django.utils import timezone
+from django.utils.functional import cached_property
+
+from .bulk import insert_objects, refresh_visibility
+from .deletion import raw_delete
+from .models import (
+    ArchivedComment, ArchivedPost, Category, Comment, Location, Post, User,
+    UserDeletion
+)
+from .pagecache import bump_page_generation
+
+POST_FIELDS = (
+    'id', 'is_published', 'created_at', 'title', 'text', 'pub_date',
+    'author_id', 'location_id', 'category_id', 'image_meta',
+    'image_placeholder',
+)
+COMMENT_FIELDS = ('id', 'text', 'author_id', 'post_id', 'created_at')
+
+
+@contextmanager
+def archive_atomic():
+    """Транзакции в основной базе и в архиве.
+
+    Архив фиксируется первым: если затем не удастся изменить
+    основную базу, публикации останутся в обеих, а не пропадут.
+    """
+    with transaction.atomic(using=router.db_for_write(Post)), \
+            transaction.atomic(using=router.db_for_write(ArchivedPost)):
+        yield
+
+
+def to_post(archived):
+    """Несохранённый Post с полями архивной публикации."""
+    post = Post(**{name: getattr(archived, name) for name in POST_FIELDS},
+                image=archived.image)
+    if hasattr(archived, 'comment_count'):
+        post.comment_count = archived.comment_count
+    post.archived = True
+    return post
+
+
+def archive_posts(posts):
+    """Перенос публикаций posts и их комментариев в архив.
+
+    Файлы изображений остаются в хранилище: на них ссылаются
+    архивные публикации. Перенесённые строки удаляются без Collector
+    и сигналов, поэтому кеш страниц сбрасывается один раз после
+    фиксации транзакции.
+    """
+    ids = [post.pk for post in posts]
+    comments = Comment.objects.filter(post_id__in=ids).order_by('pk')
+    with archive_atomic():
+        # Копии, оставшиеся от прерванного переноса.
+        ArchivedPost.objects.filter(pk__in=ids).delete()
+        ArchivedPost.objects.bulk_create(
+            ArchivedPost(
+                **{name: getattr(post, name) for name in POST_FIELDS},
+                image=post.image.name or '',
+            )
+            for post in posts
+        )
+        ArchivedComment.objects.bulk_create(
+            ArchivedComment(
+                **{name: getattr(comment, name) for name in COMMENT_FIELDS})
+            for comment in comments
+        )
+        raw_delete(Comment.objects.filter(post_id__in=ids))
+        raw_delete(Post.all_objects.filter(pk__in=ids))
+        transaction.on_commit(bump_page_generation)
+
+
+def unarchive_posts(archived):
+    """Возврат архивных публикаций с комментариями в основную базу.
+
+    Публикации, автор или категория которых удалены, остаются
+    в архиве. Возвращает число возвращённых публикаций.
+    """
+    archived = list(archived)
+    users = existing_ids(User, {post.author_id for post in archived})
+    categories = existing_ids(
+        Category, {post.category_id for post in archived})
+    locations = existing_ids(
+        Location, {post.location_id for post in archived})
+    restored = [post for post in archived
+                if post.author_id in users and post.category_id in categories]
+    ids = [post.pk for post in restored]
+    comments = list(ArchivedComment.objects.filter(post_id__in=ids))
+    commenters = existing_ids(
+        User, {comment.author_id for comment in comments})
+    using = router.db_for_write(Post)
+    with archive_atomic():
+        posts = [to_post(post) for post in restored]
+        for post in posts:
+            if post.location_id not in locations:
+                post.location_id = None
+        insert_objects(posts, using)
+        refresh_visibility(Post.objects.using(using).filter(pk__in=ids))
+        insert_objects((
+            Comment(**{name: getattr(comment, name)
+                       for name in COMMENT_FIELDS})
+            for comment in comments if comment.author_id in commenters
+        ), router.db_for_write(Comment))
+        ArchivedPost.objects.filter(pk__in=ids).delete()
+        transaction.on_commit(bump_page_generation)
+    return len(restored)
+
+
+def existing_ids(model, ids):
+    return set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+
+
+def as_posts(archived):
+    """Несохранённые Post с автором, категорией и местом.
+
+    Связанные объекты выбираются тремя запросами, как при
+    select_related(). Публикации удалённых авторов пропускаются.
+    """
+    posts = [to_post(post) for post in archived]
+    users = User.objects.filter(deletion__isnull=True).in_bulk(
+        {post.author_id for post in posts})
+    categories = Category.objects.in_bulk(
+        {post.category_id for post in posts})
+    locations = Location.objects.in_bulk(
+        {post.location_id for post in posts} - {None})
+    result = []
+    for post in posts:
+        if post.author_id not in users:
+            continue
+        post.author = users[post.author_id]
+        post.category = categories.get(post.category_id)
+        post.location = locations.get(post.location_id)
+        post.is_visible = bool(
+            post.is_published and post.category
+            and post.category.is_published)
+        if post.location and post.location.is_published:
+            post.visible_location = post.location
+        result.append(post)
+    return result
+
+
+def visible_archived_posts(archived=None, apply_filters=True):
+    """Архивные публикации с числом комментариев.
+
+    С apply_filters — только видимые всем, по тем же правилам,
+    что process_posts().
+    """
+    if archived is None:
+        archived = ArchivedPost.objects.all()
+    if apply_filters:
+        archived = archived.filter(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+            category_id__in=list(Category.objects.filter(
+                is_published=True).values_list('pk', flat=True)),
+        )
+    # Архив может быть в другой базе, поэтому без JOIN с UserDeletion.
+    deleted_users = list(
+        UserDeletion.objects.values_list('user_id', flat=True))
+    return archived.annotate(comment_count=Count(
+        'comments', filter=~Q(comments__author_id__in=deleted_users)))
+
+
+def archived_post_or_404(pk, user):
+    archived = visible_archived_posts(
+        ArchivedPost.objects.filter(pk=pk), apply_filters=False).first()
+    posts = as_posts([archived]) if archived else []
+    if not posts:
+        raise Http404
+    post = posts[0]
+    if post.author != user and not (
+            post.is_visible and post.pub_date <= timezone.now()):
+        raise Http404
+    return post
+
+
+def archived_comments(post):
+    """Комментарии архивной публикации как несохранённые Comment."""
+    comments = [
+        Comment(**{name: getattr(comment, name) for name in COMMENT_FIELDS})
+        for comment in ArchivedComment.objects.filter(post_id=post.pk)
+    ]
+    users = User.objects.filter(deletion__isnull=True).in_bulk(
+        {comment.author_id for comment in comments})
+    for comment in comments:
+        comment.post = post
+        comment.author = users.get(comment.author_id)
+    return [comment for comment in comments if comment.author]
+
+
+class PostsWithArchive:
+    """Публикации из основной базы, а за ними — архивные.
+
+    Подходит для Paginator. Архивируются самые старые публикации,
+    поэтому порядок по убыванию даты обычно сохраняется.
+    """
+
+    model = Post
+
+    def __init__(self, posts, archived):
+        self.posts = posts
+        self.archived = archived
+
+    @cached_property
+    def live_count(self):
+        return self.posts.count()
+
+    def count(self):
+        return self.live_count + self.archived.count()
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice):
+            return self[key:key + 1][0]
+        start, stop = key.start or 0, key.stop
+        result = []
+        if start < self.live_count:
+            result += self.posts[start:stop]
+        if stop is None or stop > self.live_count:
+            archived_stop = None if stop is None else stop - self.live_count
+            result += as_posts(self.archived[
+                max(start - self.live_count, 0):archived_stop])
+        return result
@@ -0,0 +1,151 @@
+# blog/benchmarks/templates.py
+"""Замеры рендеринга шаблонов блога на данных в памяти, без обращений к БД."""
+import tracemalloc
+from datetime import timedelta
+from pathlib import Path
+from statistics import mean, quantiles
+from time import perf_counter
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.paginator import Paginator
+from django.template.loader import render_to_string
+from django.test import RequestFactory
+from django.urls import resolve
+from django.utils import timezone
+
+from blog.forms import CommentForm
+from blog.models import Category, Comment, Location, Post, User
+
+BASELINE_PATH = Path(__file__).with_name('templates_baseline.json')
+DEFAULT_SIZES = (10, 50, 200)
+
+TEXT = ('Длинный текст публикации, в котором несколько предложений. '
+        'Он нужен, чтобы фильтры linebreaks и truncatewords '
+        'работали на данных, похожих на настоящие.\n\n') * 3
+
+
+def make_objects():
+    author = User(id=1, username='author', first_name='Автор')
+    category = Category(
+        id=1, title='Путешествия', slug='travel',
+        description='Описание категории', is_published=True)
+    location = Location(id=1, name='Остров', is_published=True)
+    return author, category, location
+
+
+def make_posts(count, author, category, location):
+    now = timezone.now()
+    posts = []
+    for number in range(1, count + 1):
+        post = Post(
+            id=number, title=f'Публикация {number}', text=TEXT,
+            pub_date=now - timedelta(hours=number), is_published=True,
+            author=author, category=category, location=location,
+        )
+        if number % 2:
+            post.image.name = f'posts_images/ab/cd/image_{number}.jpg'
+            post.image_meta = {'width': 800, 'height': 600}
+        post.comment_count = number % 7
+        posts.append(post)
+    return posts
+
+
+def make_comments(count, post, author):
+    now = timezone.now()
+    return [
+        Comment(id=number, text=f'Комментарий {number}\nвторая строка',
+                author=author, post=post,
+                created_at=now - timedelta(minutes=number))
+        for number in range(1, count + 1)
+    ]
+
+
+def make_request(url, user):
+    request = RequestFactory().get(url)
+    request.user = user
+    request.resolver_match = resolve(url)
+    return request
+
+
+def list_context(posts, per_page):
+    page = Paginator(posts, per_page).page(1)
+    return {
+        'paginator': page.paginator, 'page_obj': page,
+        'is_paginated': page.has_other_pages(), 'object_list': page,
+    }
+
+
+def build_scenarios(size):
+    """Шаблон, URL и контекст для каждой страницы при заданном размере.
+
+    Для лент size — число публикаций на странице, для страницы
+    публикации — число комментариев.
+    """
+    author, category, location = make_objects()
+    posts = make_posts(size * 2, author, category, location)
+    post = posts[0]
+    return {
+        'index': ('blog/index.html', '/', list_context(posts, size)),
+        'category': (
+            'blog/category.html', f'/category/{category.slug}/',
+            {**list_context(posts, size), 'category': category}),
+        'profile': (
+            'blog/profile.html', f'/profile/{author.username}/',
+            {**list_context(posts, size), 'profile': author}),
+        'detail': (
+            'blog/detail.html', f'/posts/{post.id}/',
+            {'post': post, 'object': post, 'form': CommentForm(),
+             'comments': make_comments(size, post, author)}),
+    }
+
+
+def measure(template, request, context, repeat, using=None):
+    render_to_string(template, context, request, using)
+    samples = []
+    for _ in range(repeat):
+        start = perf_counter()
+        render_to_string(template, context, request, using)
+        samples.append((perf_counter() - start) * 1000)
+    tracemalloc.start()
+    try:
+        render_to_string(template, context, request, using)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        'mean_ms': round(mean(samples), 3),
+        'p95_ms': round(quantiles(samples, n=20)[18], 3),
+        'peak_kib': round(peak / 1024, 1),
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeat=50, authenticated=True, using=None):
+    """Результаты вида {страница: {размер: метрики}}."""
+    results = {}
+    for size in sizes:
+        for name, (template, url, context) in build_scenarios(size).items():
+            user = context.get('profile') if authenticated else None
+            request = make_request(url, user or AnonymousUser())
+            results.setdefault(name, {})[str(size)] = measure(
+                template, request, context, repeat, using)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Строки отчёта и признак регрессии относительно базовых замеров."""
+    lines, regressed = [], False
+    for name, by_size in results.items():
+        for size, metrics in by_size.items():
+            base = baseline.get(name, {}).get(size)
+            line = (f'{name:<9} {size:>5}  '
+                    f'mean {metrics["mean_ms"]:8.3f} мс  '
+                    f'p95 {metrics["p95_ms"]:8.3f} мс  '
+                    f'peak {metrics["peak_kib"]:8.1f} КиБ')
+            if base:
+                ratio = metrics['mean_ms'] / base['mean_ms']
+                line += f'  x{ratio:.2f} к базовому'
+                if ratio > 1 + tolerance:
+                    line += '  РЕГРЕССИЯ'
+                    regressed = True
+            lines.append(line)
+    return lines, regressed
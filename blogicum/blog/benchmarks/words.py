@@ -0,0 +1,17 @@
+# blog/benchmarks/words.py
+"""Случайный текст для синтетических публикаций и комментариев."""
+WORDS = (
+    'горы море озеро лес поход город музей дорога остров река поезд '
+    'самолёт закат рассвет пустыня степь тайга ледник вулкан пещера '
+    'маяк порт рынок кофе ужин завтрак палатка костёр карта компас'
+).split()
+RARE_WORDS = ('аэростат', 'эльбрус', 'байкал', 'камчатка')
+RARE_WORD_SHARE = 0.001
+
+
+def random_text(rng, length):
+    """Частые слова и изредка одно редкое — для поиска по нему."""
+    words = rng.choices(WORDS, k=length)
+    if rng.random() < RARE_WORD_SHARE:
+        words.append(rng.choice(RARE_WORDS))
+    return ' '.join(words)
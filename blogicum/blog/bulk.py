@@ -0,0 +1,100 @@
+# blog/bulk.py
+"""Массовая загрузка данных блога в обход save() и сигналов."""
+from contextlib import contextmanager
+
+from django.core.management.color import no_style
+from django.db import connections, transaction
+from django.db.models import Exists, OuterRef, Q, Subquery
+
+from .models import Category, Location, Post
+
+from .pagecache import bump_page_generation
+from .utils import batched
+from .search import drop_search_triggers, install_search_index
+
+
+@contextmanager
+def bulk_load(models, using):
+    """Блок массовой вставки объектов models.
+
+    Вызывается внутри транзакции. На время блока в SQLite
+    отключаются триггеры поискового индекса, после него
+    пересчитываются производные данные (rebuild_derived_data).
+    """
+    connection = connections[using]
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            drop_search_triggers(cursor)
+    yield
+    rebuild_derived_data(models, using)
+
+
+def insert_rows(model, fields, rows, using, batch_size):
+    """Вставка кортежей значений полей fields без создания объектов.
+
+    Для таблиц на миллионы строк: bulk_create() тратит большую часть
+    времени на создание экземпляров и подготовку каждого значения.
+    Значения должны быть уже в виде для базы данных, например даты —
+    после connection.ops.adapt_datetimefield_value().
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    columns = ', '.join(
+        quote(model._meta.get_field(name).column) for name in fields)
+    sql = (f'INSERT INTO {quote(model._meta.db_table)} ({columns}) '
+           f'VALUES ({", ".join(["%s"] * len(fields))})')
+    with connection.cursor() as cursor:
+        for batch in batched(rows, batch_size):
+            cursor.executemany(sql, batch)
+
+
+def insert_objects(objects, using, batch_size=1000):
+    """Вставка экземпляров одной модели со значениями полей как есть.
+
+    bulk_create(), в отличие от loaddata, заменяет значения полей
+    auto_now и auto_now_add текущим временем; здесь они сохраняются.
+    Первичные ключи объектов должны быть заданы.
+    """
+    objects = list(objects)
+    if not objects:
+        return
+    model = type(objects[0])
+    connection = connections[using]
+    fields = model._meta.concrete_fields
+    rows = (
+        [field.get_db_prep_save(getattr(obj, field.attname), connection)
+         for field in fields]
+        for obj in objects
+    )
+    insert_rows(
+        model, [field.name for field in fields], rows, using, batch_size)
+
+
+def refresh_visibility(posts):
+    """Пересчёт Post.is_visible и Post.visible_location одним UPDATE."""
+    using = posts.db
+    return posts.update(
+        is_visible=Q(is_published=True) & Exists(
+            Category.objects.using(using).filter(
+                pk=OuterRef('category_id'), is_published=True)),
+        visible_location=Subquery(
+            Location.objects.using(using).filter(
+                pk=OuterRef('location_id'), is_published=True).values('pk')),
+    )
+
+
+def rebuild_derived_data(models, using):
+    """Пересчёт производных данных после массовой вставки.
+
+    Последовательности первичных ключей, видимость публикаций,
+    поисковый индекс и кеш страниц.
+    """
+    connection = connections[using]
+    if Post in models:
+        refresh_visibility(Post.all_objects.using(using))
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+        if connection.vendor == 'sqlite':
+            install_search_index(cursor)
+    transaction.on_commit(bump_page_generation, using=using)
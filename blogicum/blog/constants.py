@@ -1,2 +1,29 @@
 POSTS_ON_PAGE = 10
 MAX_TEXT = 50
+POST_IMAGES_DIR = 'posts_images'
+MEDIA_GC_BATCH_SIZE = 500
+MEDIA_GC_MIN_AGE = 60 * 60
+POST_IMAGE_HEADER_LIMIT = 256 * 1024
+POST_IMAGE_UPLOAD_VIEWS = ('blog:create_post', 'blog:edit_post')
+WEBP_QUALITY = 80
+PLACEHOLDER_SIZE = 16
+PLACEHOLDER_QUALITY = 40
+PLACEHOLDER_MAX_LENGTH = 1024
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+PRESIGNED_URL_EXPIRES = 15 * 60
+OBJECT_UPLOAD_SALT = 'blog.storage.object_upload'
+IMAGE_KEY_SALT = 'blog.forms.image_key'
+IMAGE_KEY_MAX_AGE = 24 * 60 * 60
+COMPRESSIBLE_STATIC = ('.css', '.js', '.svg', '.txt', '.html', '.json', '.ico')
+STATIC_IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+STATIC_MAX_AGE = 60 * 60
+COMPRESSIBLE_CONTENT_TYPES = (
+    'text/', 'application/json', 'application/javascript',
+    'application/xml', 'image/svg+xml',
+)
+STREAM_CHUNK_SIZE = 4 * 1024
+REPLICA_PIN_COOKIE = 'replica_pin'
+SEARCH_MAX_TERMS = 10
+SEARCH_WEIGHTS = (10.0, 1.0)
+QUERY_BUDGET_SLOWEST = 3
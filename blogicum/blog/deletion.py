@@ -0,0 +1,105 @@
+# blog/deletion.py
+"""Мягкое удаление публикаций и пользователей и фоновая очистка.
+
+Удаление в запросе только ставит отметку: публикация получает
+deleted_at, пользователь — UserDeletion и is_active=False. Строки
+удаляет purge_deleted порциями по batch_size без загрузки объектов
+и без сигналов, поэтому удаление автора с тысячами публикаций не
+упирается во время запроса и память.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .images import stored_files
+from .models import (
+    ArchivedComment, ArchivedPost, Comment, Post, User, UserDeletion
+)
+from .pagecache import bump_page_generation
+
+
+def raw_delete(queryset):
+    """DELETE по условию queryset без Collector и сигналов."""
+    return queryset._raw_delete(queryset.db)
+
+
+def mark_posts_deleted(posts):
+    posts.update(deleted_at=timezone.now())
+    transaction.on_commit(bump_page_generation)
+
+
+def mark_post_deleted(post):
+    mark_posts_deleted(Post.objects.filter(pk=post.pk))
+
+
+def schedule_users_deletion(users):
+    """Блокировка пользователей и скрытие их публикаций.
+
+    Комментарии пользователей скрываются по отметке UserDeletion.
+    """
+    ids = list(users.values_list('pk', flat=True))
+    with transaction.atomic():
+        User.objects.filter(pk__in=ids).update(is_active=False)
+        UserDeletion.objects.bulk_create(
+            [UserDeletion(user_id=pk) for pk in ids], ignore_conflicts=True)
+        mark_posts_deleted(Post.objects.filter(author_id__in=ids))
+
+
+def schedule_user_deletion(user):
+    schedule_users_deletion(User.objects.filter(pk=user.pk))
+
+
+def delete_in_batches(queryset, batch_size):
+    """Удаление строк queryset порциями; возвращает их число."""
+    deleted = 0
+    while ids := list(
+            queryset.order_by().values_list('pk', flat=True)[:batch_size]):
+        deleted += raw_delete(queryset.model._base_manager.using(
+            queryset.db).filter(pk__in=ids))
+    return deleted
+
+
+def purge_posts(batch_size):
+    """Удаление отмеченных публикаций с комментариями и изображениями.
+
+    Возвращает число удалённых публикаций и комментариев.
+    """
+    posts = comments = 0
+    deleted = Post.all_objects.filter(deleted_at__isnull=False)
+    storage = Post._meta.get_field('image').storage
+    while batch := list(deleted.order_by('pk').values_list(
+            'pk', 'image', 'image_meta')[:batch_size]):
+        ids = [pk for pk, _, _ in batch]
+        comments += delete_in_batches(
+            Comment.objects.filter(post_id__in=ids), batch_size)
+        with transaction.atomic():
+            posts += raw_delete(Post.all_objects.filter(pk__in=ids))
+            names = [name for _, image, meta in batch if image
+                     for name in stored_files(image, meta)]
+            transaction.on_commit(
+                lambda names=names: [storage.delete(name) for name in names])
+    return posts, comments
+
+
+def purge_users(batch_size):
+    """Удаление пользователей с отметкой UserDeletion.
+
+    Публикации пользователя к этому моменту уже удалены
+    purge_posts(); здесь удаляются его комментарии к чужим
+    публикациям, архивные данные и сама учётная запись.
+    """
+    users = 0
+    for user_id in UserDeletion.objects.values_list('user_id', flat=True):
+        if Post.all_objects.filter(author_id=user_id).exists():
+            continue  # Дойдёт очередь после следующего purge_posts().
+        delete_in_batches(Comment.objects.filter(author_id=user_id),
+                          batch_size)
+        delete_in_batches(
+            ArchivedComment.objects.filter(post__author_id=user_id),
+            batch_size)
+        delete_in_batches(
+            ArchivedComment.objects.filter(author_id=user_id), batch_size)
+        delete_in_batches(
+            ArchivedPost.objects.filter(author_id=user_id), batch_size)
+        User.objects.filter(pk=user_id).delete()
+        users += 1
+    return users
@@ -1,7 +1,11 @@
 # blog/forms.py
 from django import forms
 from django.contrib.auth.forms import UserChangeForm
+from django.core import signing
+from django.core.files.uploadedfile import UploadedFile
 
+from .constants import IMAGE_KEY_MAX_AGE, IMAGE_KEY_SALT
+from .images import image_limits_error, read_stored_image_meta
 from .models import Comment, Post, User
 
 
@@ -16,6 +20,12 @@ class CommentForm(forms.ModelForm):
 class PostForm(forms.ModelForm):
     """Форма создания/редактирования публикаций."""
 
+    image_key = forms.CharField(
+        widget=forms.HiddenInput,
+        required=False,
+        help_text='Ключ изображения, загруженного напрямую в хранилище.',
+    )
+
     class Meta:
         model = Post
         exclude = ('author',)
@@ -26,6 +36,61 @@ class PostForm(forms.ModelForm):
             )
         }
 
+    def __init__(self, *args, upload_errors=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_errors = upload_errors or {}
+
+    def clean_image(self):
+        if 'image' in self.upload_errors:
+            raise forms.ValidationError(self.upload_errors['image'])
+        image = self.cleaned_data['image']
+        if not isinstance(image, UploadedFile):
+            return image
+        width, height = image.image.size
+        error = image_limits_error(image.size, width * height)
+        if error:
+            raise forms.ValidationError(error)
+        return image
+
+    def clean_image_key(self):
+        """Подключение изображения, уже загруженного в хранилище."""
+        token = self.cleaned_data['image_key']
+        if not token or isinstance(self.cleaned_data.get('image'),
+                                   UploadedFile):
+            return ''
+        try:
+            name = signing.loads(
+                token, salt=IMAGE_KEY_SALT, max_age=IMAGE_KEY_MAX_AGE)
+        except signing.BadSignature:
+            raise forms.ValidationError(
+                'Ссылка на загруженное изображение недействительна.')
+        storage = Post._meta.get_field('image').storage
+        if not storage.exists(name):
+            raise forms.ValidationError(
+                'Изображение не было загружено в хранилище.')
+        try:
+            meta = read_stored_image_meta(storage, name)
+        except OSError:
+            storage.delete(name)
+            raise forms.ValidationError(
+                'Загруженный файл не является изображением.')
+        error = image_limits_error(
+            meta['size'], meta['width'] * meta['height'])
+        if error:
+            storage.delete(name)
+            raise forms.ValidationError(error)
+        self.cleaned_data['image'] = name
+        self.stored_image_meta = meta
+        return name
+
+    def save(self, commit=True):
+        # WebP-копию и заглушку для файла из хранилища строит команда
+        # build_image_derivatives, чтобы не скачивать его в запросе.
+        if self.cleaned_data.get('image_key'):
+            self.instance.image_meta = self.stored_image_meta
+            self.instance.image_placeholder = ''
+        return super().save(commit)
+
 
 class ProfileForm(UserChangeForm):
     """Форма редактирования профиля пользователя."""
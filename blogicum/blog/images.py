@@ -0,0 +1,203 @@
+# blog/images.py
+import posixpath
+import re
+from base64 import b64encode
+from io import BytesIO
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.template.defaultfilters import filesizeformat
+from django.utils import timezone
+from PIL import Image, ImageFilter, features
+
+from .constants import (
+    PLACEHOLDER_MAX_LENGTH, PLACEHOLDER_QUALITY, PLACEHOLDER_SIZE,
+    POST_IMAGE_HEADER_LIMIT, POST_IMAGES_DIR, WEBP_QUALITY
+)
+
+SHARD_PATTERNS = {
+    'hash': r'[0-9a-f]{2}',
+    'date': r'\d{4}/\d{2}/\d{2}',
+}
+
+
+def shard_dirs(instance):
+    """Вложенные каталоги для изображения по POST_IMAGE_SHARDING.
+
+    hash — случайный шестнадцатеричный префикс глубиной
+    POST_IMAGE_SHARD_DEPTH, date — дата создания публикации.
+    """
+    layout = settings.POST_IMAGE_SHARDING
+    if layout == 'hash':
+        digest = uuid4().hex
+        return [digest[i * 2:i * 2 + 2]
+                for i in range(settings.POST_IMAGE_SHARD_DEPTH)]
+    if layout == 'date':
+        created = timezone.localtime(instance.created_at or timezone.now())
+        return [f'{created:%Y}', f'{created:%m}', f'{created:%d}']
+    return []
+
+
+def post_image_upload_to(instance, filename):
+    return posixpath.join(POST_IMAGES_DIR, *shard_dirs(instance), filename)
+
+
+def is_sharded(name):
+    """Лежит ли файл в каталоге, соответствующем текущей раскладке."""
+    layout = settings.POST_IMAGE_SHARDING
+    if layout not in SHARD_PATTERNS:
+        return True
+    shard = SHARD_PATTERNS[layout]
+    if layout == 'hash':
+        shard = '/'.join([shard] * settings.POST_IMAGE_SHARD_DEPTH)
+    return re.fullmatch(
+        rf'{re.escape(POST_IMAGES_DIR)}/{shard}/[^/]+', name) is not None
+
+
+def read_image_meta(file):
+    """Размеры, размер в байтах и формат загружаемого изображения.
+
+    Читается только заголовок файла, полное декодирование не выполняется.
+    """
+    position = file.tell() if hasattr(file, 'tell') else None
+    file.seek(0)
+    try:
+        with Image.open(file) as image:
+            width, height = image.size
+            image_format = image.format
+    finally:
+        if position is not None:
+            file.seek(position)
+    return {
+        'width': width,
+        'height': height,
+        'size': file.size,
+        'format': image_format,
+    }
+
+
+def read_stored_image_meta(storage, name):
+    """Параметры изображения, уже лежащего в хранилище.
+
+    Размер берётся из метаданных объекта, размеры — из первых
+    POST_IMAGE_HEADER_LIMIT байт; целиком объект скачивается, только
+    если заголовок в них не уместился.
+    """
+    size = storage.size(name)
+    header = storage.read_start(name, POST_IMAGE_HEADER_LIMIT)
+    try:
+        with Image.open(BytesIO(header)) as image:
+            width, height = image.size
+            image_format = image.format
+    except OSError:
+        if len(header) >= size:
+            raise
+        with storage.open(name) as file:
+            return read_image_meta(file)
+    return {
+        'width': width,
+        'height': height,
+        'size': size,
+        'format': image_format,
+    }
+
+
+def build_placeholder(file):
+    """Крошечная размытая копия изображения в виде data URI.
+
+    Пустая строка, если копия не укладывается в PLACEHOLDER_MAX_LENGTH.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        image.draft('RGB', (PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+        image = image.convert('RGB')
+    file.seek(0)
+    image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+    buffer = BytesIO()
+    image.filter(ImageFilter.GaussianBlur(1)).save(
+        buffer, 'JPEG', quality=PLACEHOLDER_QUALITY, optimize=True)
+    uri = 'data:image/jpeg;base64,' + b64encode(buffer.getvalue()).decode()
+    return uri if len(uri) <= PLACEHOLDER_MAX_LENGTH else ''
+
+
+def webp_name(name):
+    return f'{name}.webp'
+
+
+def save_webp(storage, name, file):
+    """Сохранение WebP-копии изображения рядом с оригиналом.
+
+    Возвращает имя и размер копии для Post.image_meta; имя равно None,
+    если WebP недоступен или копия не меньше оригинала.
+    """
+    skipped = {'webp': None}
+    if not settings.POST_IMAGE_WEBP or not features.check('webp'):
+        return skipped
+    file.seek(0)
+    with Image.open(file) as image:
+        if image.format == 'WEBP':
+            return skipped
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert(
+                'RGBA' if 'transparency' in image.info else 'RGB')
+        buffer = BytesIO()
+        image.save(buffer, 'WEBP', quality=WEBP_QUALITY)
+    file.seek(0)
+    if buffer.tell() >= file.size:
+        return skipped
+    derivative = webp_name(name)
+    storage.delete(derivative)
+    return {
+        'webp': storage.save(derivative, ContentFile(buffer.getvalue())),
+        'webp_size': buffer.tell(),
+    }
+
+
+def save_post_image(image):
+    """Сохранение загруженного изображения публикации и его производных.
+
+    Возвращает параметры изображения для Post.image_meta.
+    """
+    upload = image.file
+    meta = read_image_meta(upload)
+    image.save(image.name, upload, save=False)
+    meta.update(save_webp(image.storage, image.name, upload))
+    return meta
+
+
+def process_stored_image(storage, name):
+    """Параметры, заглушка и WebP-копия изображения из хранилища."""
+    with storage.open(name) as file:
+        meta = read_image_meta(file)
+        placeholder = build_placeholder(file)
+        meta.update(save_webp(storage, name, file))
+    return meta, placeholder
+
+
+def stored_files(name, meta):
+    """Имена всех файлов изображения в хранилище: оригинал и производные."""
+    return [item for item in (name, meta.get('webp')) if item]
+
+
+def iter_stored_files(storage, path):
+    """Обход всех файлов каталога хранилища, включая вложенные."""
+    try:
+        directories, files = storage.listdir(path)
+    except FileNotFoundError:
+        return
+    for name in files:
+        yield f'{path}/{name}'
+    for directory in directories:
+        yield from iter_stored_files(storage, f'{path}/{directory}')
+
+
+def image_limits_error(size=0, pixels=0):
+    """Текст ошибки, если изображение превышает допустимые лимиты."""
+    if size > settings.POST_IMAGE_MAX_BYTES:
+        return ('Размер изображения не должен превышать '
+                f'{filesizeformat(settings.POST_IMAGE_MAX_BYTES)}.')
+    if pixels > settings.POST_IMAGE_MAX_PIXELS:
+        return ('Изображение слишком большое: допускается не более '
+                f'{settings.POST_IMAGE_MAX_PIXELS} пикселей.')
+    return None
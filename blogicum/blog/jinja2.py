@@ -0,0 +1,50 @@
+# blog/jinja2.py
+"""Окружение Jinja2 с помощниками, которые есть в шаблонах Django."""
+from functools import wraps
+
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.formats import localize
+from django.utils.safestring import SafeData, mark_safe
+from django.utils.timezone import template_localtime
+from jinja2 import Environment
+
+from .pagecache import hole_marker
+
+
+def url(viewname, *args, **kwargs):
+    return reverse(viewname, args=args or None, kwargs=kwargs or None)
+
+
+def django_filter(func):
+    """Фильтр Django с теми же флагами, что учитывает его движок."""
+    @wraps(func)
+    def wrapper(value, *args):
+        result = value
+        if getattr(func, 'expects_localtime', False):
+            result = template_localtime(result)
+        if getattr(func, 'needs_autoescape', False):
+            result = func(result, *args, autoescape=True)
+        else:
+            result = func(result, *args)
+        if getattr(func, 'is_safe', False) and isinstance(value, SafeData):
+            result = mark_safe(result)
+        return result
+    return wrapper
+
+
+def localize_value(value):
+    """Вывод значения так же, как {{ value }} в шаблоне Django."""
+    return localize(template_localtime(value))
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({'hole': hole_marker, 'static': static, 'url': url})
+    env.filters.update({
+        name: django_filter(defaultfilters.register.filters[name])
+        for name in ('date', 'linebreaks', 'linebreaksbr', 'truncatewords')
+    })
+    env.filters['localize'] = localize_value
+    return env
@@ -0,0 +1,45 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.archive import archive_posts
+from blog.models import Post
+from blog.utils import date_start, queryset_batches
+
+
+class Command(BaseCommand):
+    help = ('Переносит публикации, опубликованные раньше границы, '
+            'вместе с комментариями в архив (BLOG_ARCHIVE_DATABASE). '
+            'Вернуть их можно командой unarchive_posts.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=settings.BLOG_ARCHIVE_AFTER_DAYS,
+            help='Граница — столько дней назад.')
+        parser.add_argument(
+            '--before', type=date_start,
+            help='Граница — дата YYYY-MM-DD, вместо --older-than.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько публикаций переносить за одну транзакцию.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только посчитать публикации для переноса.')
+
+    def handle(self, *args, older_than, before, batch_size, dry_run,
+               **options):
+        cutoff = before or timezone.now() - timedelta(days=older_than)
+        posts = Post.objects.filter(pub_date__lt=cutoff)
+        if dry_run:
+            self.stdout.write(
+                f'Публикаций старше {cutoff:%Y-%m-%d}: {posts.count()}.')
+            return
+        archived = 0
+        for batch in queryset_batches(posts, batch_size):
+            archive_posts(batch)
+            archived += len(batch)
+            self.stdout.write(f'Перенесено в архив: {archived}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Перенесено в архив публикаций: {archived}.'))
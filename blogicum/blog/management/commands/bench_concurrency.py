@@ -0,0 +1,115 @@
+import threading
+import time
+from statistics import mean, quantiles
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.urls import reverse
+
+from blog.models import Comment, Post, User
+
+
+class Command(BaseCommand):
+    help = ('Нагружает ленту чтением и добавлением комментариев из '
+            'нескольких потоков и выводит пропускную способность и '
+            'задержки. Настройки SQLite задаются SQLITE_PRAGMAS.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--readers', type=int, default=4,
+            help='Потоков, читающих blog:index.')
+        parser.add_argument(
+            '--writers', type=int, default=2,
+            help='Потоков, добавляющих комментарии через blog:add_comment.')
+        parser.add_argument(
+            '--duration', type=float, default=10,
+            help='Длительность нагрузки, секунд.')
+        parser.add_argument(
+            '--post', type=int, default=None,
+            help='Публикация для комментариев; по умолчанию последняя.')
+        parser.add_argument(
+            '--keep-comments', action='store_true',
+            help='Не удалять комментарии, добавленные во время замера.')
+
+    def handle(self, *args, readers, writers, duration, post,
+               keep_comments, **options):
+        target = (Post.objects.filter(pk=post) if post
+                  else Post.objects.order_by('-pk')).first()
+        if target is None:
+            raise CommandError('Нет публикации для комментариев.')
+        author = User.objects.get(pk=target.author_id)
+        started_at = Comment.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        self.report_pragmas()
+
+        results = self.run_load(
+            readers, writers, duration, author,
+            reverse('blog:add_comment', args=[target.pk]))
+        for kind in ('read', 'write'):
+            self.report(kind, results[kind], duration)
+        if results['errors']:
+            self.stdout.write(self.style.ERROR(
+                f'Ошибок: {len(results["errors"])}, '
+                f'например {results["errors"][0]}'))
+        if not keep_comments:
+            Comment.objects.filter(
+                pk__gt=started_at, post=target, author=author).delete()
+
+    def run_load(self, readers, writers, duration, author, comment_url):
+        """Запуск потоков; задержки запросов по видам и ошибки."""
+        deadline = time.perf_counter() + duration
+        results = {'read': [], 'write': [], 'errors': []}
+        lock = threading.Lock()
+        threads = [
+            threading.Thread(target=self.worker, args=(
+                kind, deadline, author, comment_url, results, lock))
+            for kind, count in (('read', readers), ('write', writers))
+            for _ in range(count)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def worker(self, kind, deadline, author, comment_url, results, lock):
+        client = Client()
+        if kind == 'write':
+            client.force_login(author)
+        samples, errors = [], []
+        try:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                if kind == 'read':
+                    response = client.get(reverse('blog:index'))
+                else:
+                    response = client.post(
+                        comment_url, {'text': 'Нагрузочный тест'})
+                samples.append((time.perf_counter() - start) * 1000)
+                if response.status_code >= 400:
+                    errors.append(response.status_code)
+        except Exception as error:
+            errors.append(repr(error))
+        finally:
+            connections.close_all()
+        with lock:
+            results[kind].extend(samples)
+            results['errors'].extend(errors)
+
+    def report_pragmas(self):
+        with connection.cursor() as cursor:
+            values = []
+            for name in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {name}')
+                values.append(f'{name}={cursor.fetchone()[0]}')
+        self.stdout.write(', '.join(values))
+
+    def report(self, kind, samples, duration):
+        if len(samples) < 2:
+            self.stdout.write(f'{kind}: недостаточно запросов')
+            return
+        self.stdout.write(
+            f'{kind}: {len(samples) / duration:.1f} запросов/с, '
+            f'mean {mean(samples):.1f} мс, '
+            f'p95 {quantiles(samples, n=20)[18]:.1f} мс')
@@ -0,0 +1,108 @@
+import random
+import sqlite3
+import tempfile
+from pathlib import Path
+from statistics import mean
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from blog.benchmarks.words import random_text
+from blog.constants import SEARCH_WEIGHTS
+from blog.search import FTS_TABLE, install_search_index, match_expression
+from blog.utils import batched
+
+DEFAULT_QUERIES = ('горы', 'байкал', 'закат море', 'аэрос')
+TRIGGER_ROWS = 10_000
+
+
+class Command(BaseCommand):
+    help = ('Заполняет временную базу SQLite публикациями и сравнивает '
+            'поиск через индекс FTS5 с перебором LIKE.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, default=1_000_000,
+            help='Число публикаций во временной базе.')
+        parser.add_argument(
+            '--repeat', type=int, default=5,
+            help='Сколько раз выполнять каждый запрос.')
+        parser.add_argument(
+            '--query', action='append', dest='queries',
+            help='Поисковый запрос; можно указать несколько раз.')
+        parser.add_argument(
+            '--seed', type=int, default=1, help='Зерно генератора текста.')
+
+    def handle(self, *args, rows, repeat, queries, seed, **options):
+        with tempfile.TemporaryDirectory() as directory:
+            db = sqlite3.connect(Path(directory) / 'search.sqlite3')
+            db.execute('PRAGMA journal_mode = WAL')
+            db.execute('PRAGMA synchronous = OFF')
+            db.execute('CREATE TABLE blog_post ('
+                       'id INTEGER PRIMARY KEY, title TEXT, text TEXT)')
+            self.fill(db, rows, random.Random(seed))
+            for query in queries or DEFAULT_QUERIES:
+                self.compare(db, query, repeat)
+            db.close()
+
+    def timed(self, label, action):
+        start = perf_counter()
+        action()
+        self.stdout.write(f'{label}: {perf_counter() - start:.2f} с')
+
+    def fill(self, db, rows, rng):
+        def insert(first, count):
+            generated = (
+                (number, random_text(rng, 4), random_text(rng, 60))
+                for number in range(first, first + count))
+            for batch in batched(generated, 10_000):
+                db.executemany(
+                    'INSERT INTO blog_post VALUES (?, ?, ?)', batch)
+            db.commit()
+
+        def build_index():
+            install_search_index(db.cursor())
+            db.commit()
+
+        self.timed(f'Вставка {rows} публикаций', lambda: insert(1, rows))
+        self.timed('Построение индекса', build_index)
+        self.timed(
+            f'Вставка {TRIGGER_ROWS} публикаций с обновлением индекса',
+            lambda: insert(rows + 1, TRIGGER_ROWS))
+
+    def compare(self, db, query, repeat):
+        match = match_expression(query)
+        weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+        fts_sql = (
+            f'SELECT rowid, bm25({FTS_TABLE}, {weights}) AS rank '
+            f'FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? '
+            f'ORDER BY rank LIMIT 10'
+        )
+        # Запрос той же формы, что строит search_posts().
+        view_sql = (
+            f'SELECT id, {FTS_TABLE}.rank FROM blog_post, {FTS_TABLE} '
+            f'WHERE {FTS_TABLE}.rowid = blog_post.id '
+            f'AND {FTS_TABLE} MATCH ? AND {FTS_TABLE}.rank MATCH ? '
+            f'GROUP BY id ORDER BY 2, id DESC LIMIT 10'
+        )
+        count_sql = (f'SELECT count(*) FROM {FTS_TABLE} '
+                     f'WHERE {FTS_TABLE} MATCH ?')
+        like = query.split()[-1]
+        like_sql = ('SELECT count(*) FROM blog_post '
+                    'WHERE title LIKE ? OR text LIKE ?')
+        found = db.execute(count_sql, [match]).fetchone()[0]
+        self.stdout.write(f'\nЗапрос «{query}», найдено {found}:')
+        for label, sql, params in (
+            ('FTS5, 10 лучших по bm25', fts_sql, [match]),
+            ('FTS5, запрос search_posts()', view_sql,
+             [match, f'bm25({weights})']),
+            ('FTS5, число совпадений', count_sql, [match]),
+            (f'LIKE «{like}», число совпадений', like_sql,
+             [f'%{like}%'] * 2),
+        ):
+            samples = []
+            for _ in range(repeat):
+                start = perf_counter()
+                db.execute(sql, params).fetchall()
+                samples.append((perf_counter() - start) * 1000)
+            self.stdout.write(f'  {label}: {mean(samples):.1f} мс')
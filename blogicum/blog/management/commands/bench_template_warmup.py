@@ -0,0 +1,53 @@
+from statistics import mean
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+from django.template import engines
+from django.test import Client
+
+from blog.warmup import warm_templates
+
+
+def reset_template_caches():
+    for engine in engines.all():
+        for loader in getattr(engine, 'engine', engine).template_loaders:
+            if hasattr(loader, 'reset'):
+                loader.reset()
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время первого и последующих запросов к странице '
+            'без предварительной компиляции шаблонов и с ней.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='/', help='Адрес страницы.')
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Число запросов для установившегося режима.')
+
+    def handle(self, *args, url, repeat, **options):
+        client = Client()
+
+        def timed_get():
+            start = perf_counter()
+            client.get(url)
+            return (perf_counter() - start) * 1000
+
+        timed_get()  # Прогрев кода представлений и соединения с БД.
+        reset_template_caches()
+        cold = timed_get()
+
+        reset_template_caches()
+        start = perf_counter()
+        compiled = warm_templates()
+        warmup = (perf_counter() - start) * 1000
+        warm = timed_get()
+
+        steady = mean(timed_get() for _ in range(repeat))
+        self.stdout.write(
+            f'Скомпилировано при старте шаблонов: {compiled} '
+            f'за {warmup:.1f} мс\n'
+            f'Первый запрос без прогрева: {cold:.1f} мс\n'
+            f'Первый запрос после прогрева: {warm:.1f} мс\n'
+            f'Установившийся режим ({repeat} запросов): {steady:.1f} мс'
+        )
@@ -0,0 +1,58 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.benchmarks import templates
+
+
+class Command(BaseCommand):
+    help = ('Измеряет время и память рендеринга шаблонов ленты, категории, '
+            'профиля и публикации и сравнивает их с базовыми замерами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes', default=','.join(map(str, templates.DEFAULT_SIZES)),
+            help='Размеры через запятую: публикаций на странице '
+                 'или комментариев к публикации.')
+        parser.add_argument(
+            '--repeat', type=int, default=50,
+            help='Сколько раз рендерить каждый шаблон.')
+        parser.add_argument(
+            '--baseline', default=str(templates.BASELINE_PATH),
+            help='JSON-файл с базовыми замерами.')
+        parser.add_argument(
+            '--save-baseline', action='store_true',
+            help='Записать результаты как новые базовые замеры.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимое замедление относительно базового, доля.')
+        parser.add_argument(
+            '--anonymous', action='store_true',
+            help='Рендерить страницы для анонимного пользователя.')
+        parser.add_argument(
+            '--engine', default=None,
+            help='Движок шаблонов из TEMPLATES, например django или jinja2.')
+
+    def handle(self, *args, sizes, repeat, baseline, save_baseline,
+               tolerance, anonymous, engine, **options):
+        if repeat < 2:
+            raise CommandError('Нужно не меньше двух повторов.')
+        sizes = [int(size) for size in sizes.split(',')]
+        results = templates.run(
+            sizes, repeat, authenticated=not anonymous, using=engine)
+        if save_baseline:
+            with open(baseline, 'w') as file:
+                json.dump(results, file, indent=2, sort_keys=True)
+            self.stdout.write(f'Базовые замеры записаны в {baseline}.')
+            baseline_results = {}
+        else:
+            try:
+                with open(baseline) as file:
+                    baseline_results = json.load(file)
+            except FileNotFoundError:
+                baseline_results = {}
+        lines, regressed = templates.compare(
+            results, baseline_results, tolerance)
+        self.stdout.write('\n'.join(lines))
+        if regressed:
+            raise CommandError('Рендеринг медленнее базовых замеров.')
@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.template.defaultfilters import filesizeformat
+
+from blog.images import process_stored_image
+from blog.models import Post
+from blog.utils import queryset_batches
+
+
+class Command(BaseCommand):
+    help = ('Создаёт WebP-копии, заглушки и параметры для уже '
+            'загруженных изображений публикаций, в том числе подключённых '
+            'прямой загрузкой в хранилище, и выводит отчёт об экономии. '
+            'Запускается периодически.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=100,
+            help='Сколько публикаций обновлять за один запрос.')
+        parser.add_argument(
+            '--report', action='store_true',
+            help='Только вывести отчёт, ничего не создавая.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Пересоздать производные и для обработанных изображений.')
+
+    def handle(self, *args, batch_size, report, force, **options):
+        if not report:
+            self.build(batch_size, force)
+        self.report()
+
+    def build(self, batch_size, force):
+        posts = Post.objects.exclude(image='').only(
+            'image', 'image_meta', 'image_placeholder')
+        if not force:
+            posts = posts.filter(
+                ~Q(image_meta__has_key='webp') | Q(image_placeholder=''))
+        built = 0
+        for batch in queryset_batches(posts, batch_size):
+            for post in batch:
+                self.build_one(post)
+            Post.objects.bulk_update(
+                batch, ['image_meta', 'image_placeholder'])
+            built += len(batch)
+            self.stdout.write(f'Обработано изображений: {built}')
+
+    def build_one(self, post):
+        storage = post.image.storage
+        if not storage.exists(post.image.name):
+            self.stderr.write(f'Файл не найден: {post.image.name}')
+            return
+        post.image_meta, post.image_placeholder = process_stored_image(
+            storage, post.image.name)
+
+    def report(self):
+        originals = derivatives = count = 0
+        for meta in (Post.objects.filter(image_meta__webp_size__isnull=False)
+                     .values_list('image_meta', flat=True).iterator()):
+            originals += meta['size']
+            derivatives += meta['webp_size']
+            count += 1
+        saved = originals - derivatives
+        percent = saved * 100 / originals if originals else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Изображений с WebP-копией: {count}. '
+            f'Оригиналы: {filesizeformat(originals)}, '
+            f'WebP: {filesizeformat(derivatives)}, '
+            f'экономия: {filesizeformat(saved)} ({percent:.1f}%).'))
@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.constants import (
+    MEDIA_GC_BATCH_SIZE, MEDIA_GC_MIN_AGE, POST_IMAGES_DIR
+)
+from blog.images import iter_stored_files
+from blog.models import ArchivedPost, Post
+from blog.utils import batched
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из MEDIA_ROOT изображения, на которые '
+            'не ссылается ни одна публикация.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести найденные файлы, ничего не удаляя.')
+        parser.add_argument(
+            '--batch-size', type=int, default=MEDIA_GC_BATCH_SIZE,
+            help='Сколько файлов сверять с базой за один запрос.')
+        parser.add_argument(
+            '--min-age', type=int, default=MEDIA_GC_MIN_AGE,
+            help='Не трогать файлы моложе указанного числа секунд: '
+                 'их публикация может быть ещё не сохранена.')
+
+    def handle(self, *args, dry_run, batch_size, min_age, **options):
+        storage = Post._meta.get_field('image').storage
+        newer_than = timezone.now() - timedelta(seconds=min_age)
+        orphans = checked = 0
+        for names in batched(
+                iter_stored_files(storage, POST_IMAGES_DIR), batch_size):
+            checked += len(names)
+            referenced = set()
+            # Изображения архивных публикаций тоже используются.
+            for model in (Post, ArchivedPost):
+                for image, webp in model.objects.filter(
+                    Q(image__in=names) | Q(image_meta__webp__in=names)
+                ).values_list('image', 'image_meta__webp'):
+                    referenced.update((image, webp))
+            for name in names:
+                if (name in referenced
+                        or storage.get_modified_time(name) > newer_than):
+                    continue
+                orphans += 1
+                if options['verbosity'] > 1 or dry_run:
+                    self.stdout.write(name)
+                if not dry_run:
+                    storage.delete(name)
+        action = 'Найдено' if dry_run else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено файлов: {checked}. '
+            f'{action} неиспользуемых: {orphans}.'))
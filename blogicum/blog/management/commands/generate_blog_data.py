@@ -0,0 +1,187 @@
+import random
+from datetime import timedelta
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from blog.benchmarks.words import random_text
+from blog.bulk import bulk_load, insert_objects, insert_rows
+from blog.models import Category, Comment, Location, Post, User
+
+PASSWORD = 'password'
+HISTORY = timedelta(days=3 * 365)
+SCHEDULED_AHEAD = timedelta(days=30)
+TEXT_POOL_SIZE = 5000
+ZIPF_BATCH_SIZE = 10_000
+POST_FIELDS = (
+    'id', 'title', 'text', 'author', 'category', 'location', 'is_published',
+    'pub_date', 'created_at', 'image', 'image_meta', 'image_placeholder',
+    'is_visible', 'visible_location',
+)
+COMMENT_FIELDS = ('id', 'text', 'author', 'post', 'created_at')
+
+
+class Command(BaseCommand):
+    help = ('Заполняет базу синтетическими пользователями, категориями, '
+            'местоположениями, публикациями и комментариями для '
+            'нагрузочных замеров. При одинаковом --seed данные '
+            'одинаковы с точностью до дат, которые отсчитываются от '
+            'момента запуска. Пароль всех пользователей — «password».')
+
+    def add_arguments(self, parser):
+        for name, default in (('users', 1000), ('categories', 20),
+                              ('locations', 200), ('posts', 100_000),
+                              ('comments', 1_000_000)):
+            parser.add_argument(
+                f'--{name}', type=int, default=default,
+                help=f'Сколько создать, по умолчанию {default}.')
+        parser.add_argument('--seed', type=int, default=1,
+                            help='Зерно генератора случайных чисел.')
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения Ципфа для числа комментариев '
+                 'к публикации и публикаций у автора.')
+        parser.add_argument(
+            '--unpublished-share', type=float, default=0.05,
+            help='Доля снятых с публикации категорий, мест и публикаций.')
+        parser.add_argument(
+            '--scheduled-share', type=float, default=0.05,
+            help='Доля отложенных публикаций.')
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Сколько объектов вставлять одним запросом.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='База данных для заполнения.')
+
+    def handle(self, *args, seed, database, **options):
+        if options['posts'] and not (options['users']
+                                     and options['categories']):
+            raise CommandError('Для публикаций нужны авторы и категории.')
+        if options['comments'] and not (options['users']
+                                        and options['posts']):
+            raise CommandError('Для комментариев нужны авторы и публикации.')
+        self.rng = random.Random(seed)
+        self.options = options
+        self.using = database
+        self.now = timezone.now().replace(microsecond=0)
+        self.adapt_datetime = (
+            connections[database].ops.adapt_datetimefield_value)
+        models = [User, Category, Location, Post, Comment]
+        with transaction.atomic(using=database), bulk_load(models, database):
+            users = self.create(User, options['users'], self.users)
+            categories = self.create(
+                Category, options['categories'], self.categories)
+            locations = self.create(
+                Location, options['locations'], self.locations)
+            # Публикаций и комментариев на порядки больше, они
+            # вставляются готовыми строками, без экземпляров моделей.
+            posts = self.create(
+                Post, options['posts'], lambda first, count: self.posts(
+                    first, count, users, categories, locations),
+                POST_FIELDS)
+            self.create(
+                Comment, options['comments'], lambda first, count: (
+                    self.comments(first, count, users, posts)),
+                COMMENT_FIELDS)
+        self.stdout.write(self.style.SUCCESS('Данные созданы.'))
+
+    def create(self, model, count, build, fields=None):
+        """Вставка count объектов build(первый pk, count) порциями.
+
+        С fields build() возвращает кортежи значений этих полей.
+        Возвращает диапазон созданных первичных ключей.
+        """
+        manager = model.objects.using(self.using)
+        first = (manager.aggregate(last=Max('pk'))['last'] or 0) + 1
+        rows = build(first, count)
+        batch_size = self.options['batch_size']
+        if fields:
+            insert_rows(model, fields, rows, self.using, batch_size)
+        else:
+            insert_objects(rows, self.using, batch_size)
+        self.stdout.write(f'{model._meta.label}: {count}')
+        return range(first, first + count)
+
+    def text_pool(self, min_words, max_words):
+        """Выбор из заранее созданных текстов.
+
+        Так быстрее, чем собирать текст для каждой строки.
+        """
+        pool = [random_text(self.rng, self.rng.randint(min_words, max_words))
+                for _ in range(TEXT_POOL_SIZE)]
+        return lambda: self.rng.choice(pool)
+
+    def zipf_choices(self, population):
+        """Выбор из population с вероятностью 1 / rank ** zipf.
+
+        Ранги перемешаны, чтобы популярными были не первые объекты.
+        Значения выбираются порциями: choices() с k быстрее, чем
+        по одному.
+        """
+        ranked = list(population)
+        self.rng.shuffle(ranked)
+        cum_weights = list(accumulate(
+            1 / rank ** self.options['zipf']
+            for rank in range(1, len(ranked) + 1)))
+        while True:
+            yield from self.rng.choices(
+                ranked, cum_weights=cum_weights, k=ZIPF_BATCH_SIZE)
+
+    def is_unpublished(self):
+        return self.rng.random() < self.options['unpublished_share']
+
+    def past(self):
+        return self.now - HISTORY * self.rng.random()
+
+    def users(self, first, count):
+        password = make_password(PASSWORD)
+        for pk in range(first, first + count):
+            yield User(
+                pk=pk, username=f'user{pk}', first_name=f'Пользователь {pk}',
+                password=password, date_joined=self.past())
+
+    def categories(self, first, count):
+        for pk in range(first, first + count):
+            yield Category(
+                pk=pk, title=f'Категория {pk}', slug=f'category-{pk}',
+                description=random_text(self.rng, 20),
+                is_published=not self.is_unpublished(),
+                created_at=self.past())
+
+    def locations(self, first, count):
+        for pk in range(first, first + count):
+            yield Location(
+                pk=pk, name=f'Место {pk}',
+                is_published=not self.is_unpublished(),
+                created_at=self.past())
+
+    def posts(self, first, count, users, categories, locations):
+        authors = self.zipf_choices(users)
+        title, text = self.text_pool(2, 8), self.text_pool(20, 200)
+        rng, adapt = self.rng, self.adapt_datetime
+        for pk in range(first, first + count):
+            created_at = self.past()
+            if rng.random() < self.options['scheduled_share']:
+                pub_date = self.now + SCHEDULED_AHEAD * rng.random()
+            else:
+                pub_date = created_at
+            location = (rng.choice(locations)
+                        if locations and rng.random() < 0.7 else None)
+            yield (pk, title(), text(), next(authors), rng.choice(categories),
+                   location, not self.is_unpublished(), adapt(pub_date),
+                   adapt(created_at), '', '{}', '',
+                   # Пересчитываются в bulk_load().
+                   True, None)
+
+    def comments(self, first, count, users, posts):
+        post_ids = self.zipf_choices(posts)
+        text = self.text_pool(3, 40)
+        rng, adapt = self.rng, self.adapt_datetime
+        for pk in range(first, first + count):
+            yield (pk, text(), rng.choice(users), next(post_ids),
+                   adapt(self.past()))
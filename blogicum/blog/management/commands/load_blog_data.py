@@ -0,0 +1,62 @@
+from django.apps import apps
+from django.core import serializers
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from blog.bulk import bulk_load, insert_objects
+from blog.utils import batched, iter_json_array
+
+LOAD_ORDER = (
+    'auth.user', 'blog.category', 'blog.location', 'blog.post',
+    'blog.comment',
+)
+
+
+class Command(BaseCommand):
+    help = ('Загружает пользователей, категории, местоположения, '
+            'публикации и комментарии из фикстур в формате JSON '
+            '(как db.json), не читая файлы в память целиком. '
+            'Остальные модели и связи многие-ко-многим пропускаются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='+', help='Файлы фикстур.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько объектов вставлять одним запросом.')
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='База данных для загрузки.')
+
+    def handle(self, *args, fixtures, batch_size, database, **options):
+        models = [apps.get_model(label) for label in LOAD_ORDER]
+        with transaction.atomic(using=database), bulk_load(models, database):
+            # Каждая модель — отдельный проход по файлам: так внешние
+            # ключи ссылаются на уже вставленные строки.
+            for model in models:
+                loaded = 0
+                for path in fixtures:
+                    loaded += self.load(path, model, batch_size, database)
+                self.stdout.write(f'{model._meta.label}: {loaded}')
+        self.stdout.write(self.style.SUCCESS('Загрузка завершена.'))
+
+    def records(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                yield from iter_json_array(file)
+        except (OSError, ValueError) as error:
+            raise CommandError(f'Не удалось прочитать {path}: {error}')
+
+    def load(self, path, model, batch_size, database):
+        label = model._meta.label_lower
+        records = (record for record in self.records(path)
+                   if record.get('model') == label)
+        loaded = 0
+        for batch in batched(records, batch_size):
+            objects = [
+                deserialized.object
+                for deserialized in serializers.deserialize(
+                    'python', batch, using=database, ignorenonexistent=True)
+            ]
+            insert_objects(objects, database, batch_size)
+            loaded += len(objects)
+        return loaded
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from blog.deletion import purge_posts, purge_users
+
+
+class Command(BaseCommand):
+    help = ('Удаляет порциями публикации, отмеченные как удалённые, '
+            'с комментариями и изображениями, а затем пользователей, '
+            'удаление которых запланировано в админке.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько строк удалять одним запросом.')
+
+    def handle(self, *args, batch_size, **options):
+        posts, comments = purge_posts(batch_size)
+        users = purge_users(batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено публикаций: {posts}, комментариев: {comments}, '
+            f'пользователей: {users}.'))
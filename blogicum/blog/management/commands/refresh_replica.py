@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.routers import refresh_replicas
+
+
+class Command(BaseCommand):
+    help = ('Копирует основную базу SQLite в реплики для чтения; '
+            'для локальной проверки маршрутизации чтения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*',
+            help='Псевдонимы реплик; по умолчанию BLOG_READ_REPLICAS.')
+
+    def handle(self, *args, aliases, **options):
+        aliases = aliases or settings.BLOG_READ_REPLICAS
+        if not aliases:
+            raise CommandError('Реплики не настроены (DJANGO_DB_REPLICAS).')
+        try:
+            refresh_replicas(aliases)
+        except ValueError as error:
+            raise CommandError(error)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено реплик: {len(aliases)}.'))
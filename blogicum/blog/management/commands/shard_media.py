@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.images import is_sharded, post_image_upload_to, webp_name
+from blog.models import Post
+from blog.utils import queryset_batches
+
+
+class Command(BaseCommand):
+    help = ('Переносит изображения публикаций в каталоги по раскладке '
+            'POST_IMAGE_SHARDING и обновляет имена файлов в базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=200,
+            help='Сколько публикаций обновлять за одну транзакцию.')
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только вывести, какие файлы будут перенесены.')
+
+    def handle(self, *args, batch_size, dry_run, **options):
+        if settings.POST_IMAGE_SHARDING is None:
+            self.stdout.write('Раскладка по каталогам выключена.')
+            return
+        posts = Post.objects.exclude(image='').only(
+            'image', 'image_meta', 'created_at')
+        moved = 0
+        for batch in queryset_batches(posts, batch_size):
+            batch = [post for post in batch if not is_sharded(post.image.name)]
+            if dry_run:
+                for post in batch:
+                    self.stdout.write(post.image.name)
+            elif batch:
+                self.move_batch(batch)
+            moved += len(batch)
+        action = 'Требуют переноса' if dry_run else 'Перенесено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{action} изображений: {moved}.'))
+
+    def move_batch(self, posts):
+        """Копирование файлов, обновление имён и удаление старых копий.
+
+        Старые файлы удаляются только после фиксации транзакции; если
+        она не удалась, новые копии позже соберёт gc_media.
+        """
+        storage = Post._meta.get_field('image').storage
+        old_names = []
+        for post in posts:
+            old_name = post.image.name
+            filename = old_name.rsplit('/', 1)[-1]
+            new_name = self.copy(
+                storage, old_name, post_image_upload_to(post, filename))
+            old_names.append(old_name)
+            post.image.name = new_name
+            if post.image_meta.get('webp'):
+                old_names.append(post.image_meta['webp'])
+                post.image_meta['webp'] = self.copy(
+                    storage, post.image_meta['webp'], webp_name(new_name))
+        with transaction.atomic():
+            Post.objects.bulk_update(posts, ['image', 'image_meta'])
+            transaction.on_commit(
+                lambda: [storage.delete(name) for name in old_names])
+
+    def copy(self, storage, source, target):
+        with storage.open(source) as file:
+            return storage.save(target, file)
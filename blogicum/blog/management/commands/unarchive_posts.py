@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.archive import unarchive_posts
+from blog.models import ArchivedPost, User
+from blog.utils import date_start, queryset_batches
+
+
+class Command(BaseCommand):
+    help = 'Возвращает публикации с комментариями из архива.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'post_ids', nargs='*', type=int, help='Номера публикаций.')
+        parser.add_argument(
+            '--author', help='Все архивные публикации пользователя.')
+        parser.add_argument(
+            '--since', type=date_start,
+            help='Архивные публикации начиная с даты YYYY-MM-DD.')
+        parser.add_argument(
+            '--all', action='store_true', help='Весь архив.')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Сколько публикаций возвращать за одну транзакцию.')
+
+    def handle(self, *args, post_ids, author, since, batch_size, **options):
+        if not (post_ids or author or since or options['all']):
+            raise CommandError(
+                'Укажите номера публикаций, --author, --since или --all.')
+        archived = ArchivedPost.objects.all()
+        if post_ids:
+            archived = archived.filter(pk__in=post_ids)
+        if author:
+            user = User.objects.filter(username=author).first()
+            if user is None:
+                raise CommandError(f'Пользователь {author} не найден.')
+            archived = archived.filter(author_id=user.pk)
+        if since:
+            archived = archived.filter(pub_date__gte=since)
+        restored = skipped = 0
+        for batch in queryset_batches(archived, batch_size):
+            count = unarchive_posts(batch)
+            restored += count
+            skipped += len(batch) - count
+        self.stdout.write(self.style.SUCCESS(
+            f'Возвращено публикаций: {restored}.'))
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                f'Остались в архиве, так как удалены автор или '
+                f'категория: {skipped}.'))
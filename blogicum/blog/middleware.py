@@ -0,0 +1,203 @@
+# blog/middleware.py
+import hashlib
+import zlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+from .constants import COMPRESSIBLE_CONTENT_TYPES, REPLICA_PIN_COOKIE
+from .querybudget import QueryBudgetExceeded, QueryCounter, get_budget, logger
+from .utils import accepted_encodings, brotli
+
+
+class GzipEncoder:
+
+    name = 'gzip'
+
+    def __init__(self):
+        self.compressor = zlib.compressobj(
+            settings.BLOG_GZIP_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+
+    def process(self, data):
+        """Сжатие части потока, которую клиент сразу может распаковать."""
+        return (self.compressor.compress(data)
+                + self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self, data=b''):
+        return self.compressor.compress(data) + self.compressor.flush()
+
+
+class BrotliEncoder:
+
+    name = 'br'
+
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.BLOG_BROTLI_QUALITY)
+
+    def process(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self, data=b''):
+        return self.compressor.process(data) + self.compressor.finish()
+
+
+def choose_encoder(request):
+    accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+    if brotli is not None and 'br' in accepted:
+        return BrotliEncoder
+    if 'gzip' in accepted:
+        return GzipEncoder
+    return None
+
+
+def compress(content, encoder_class):
+    return encoder_class().finish(content)
+
+
+def compress_cached(content, encoder_class, timeout):
+    """Сжатое содержимое из кеша по хешу содержимого."""
+    digest = hashlib.md5(content, usedforsecurity=False).hexdigest()
+    key = f'blog:compressed:{encoder_class.name}:{digest}'
+    compressed = cache.get(key)
+    if compressed is None:
+        compressed = compress(content, encoder_class)
+        cache.set(key, compressed, timeout)
+    return compressed
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Сжатие ответов gzip или, если установлен пакет brotli, br.
+
+    Сжимаются только текстовые типы размером от
+    BLOG_COMPRESSION_MIN_SIZE байт. Потоковые ответы сжимаются по
+    частям без буферизации. Для страниц из кеша страниц (атрибут
+    page_cache_timeout ответа) сжатый вариант тоже кешируется.
+    """
+
+    def process_response(self, request, response):
+        if (response.has_header('Content-Encoding')
+                or response.status_code in (204, 206, 304)):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if not content_type.startswith(COMPRESSIBLE_CONTENT_TYPES):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoder_class = choose_encoder(request)
+        if encoder_class is None:
+            return response
+        if response.streaming:
+            if response.is_async:
+                response.streaming_content = self.compress_async_stream(
+                    response.streaming_content, encoder_class())
+            else:
+                response.streaming_content = self.compress_stream(
+                    response.streaming_content, encoder_class())
+            del response.headers['Content-Length']
+        else:
+            content = response.content
+            if len(content) < settings.BLOG_COMPRESSION_MIN_SIZE:
+                return response
+            timeout = getattr(response, 'page_cache_timeout', None)
+            if timeout and len(content) <= (
+                    settings.BLOG_COMPRESSION_CACHE_MAX_SIZE):
+                compressed = compress_cached(content, encoder_class, timeout)
+            else:
+                compressed = compress(content, encoder_class)
+            if len(compressed) >= len(content):
+                return response
+            response.content = compressed
+            response.headers['Content-Length'] = str(len(compressed))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoder_class.name
+        return response
+
+    @staticmethod
+    def compress_stream(chunks, encoder):
+        for chunk in chunks:
+            if chunk:
+                yield encoder.process(chunk)
+        yield encoder.finish()
+
+    @staticmethod
+    async def compress_async_stream(chunks, encoder):
+        async for chunk in chunks:
+            if chunk:
+                yield encoder.process(chunk)
+        yield encoder.finish()
+
+
+class ReplicaPinMiddleware(MiddlewareMixin):
+    """Чтение из основной базы после записи.
+
+    После запроса с изменением данных (не GET/HEAD/OPTIONS) клиент
+    получает cookie, и следующие BLOG_REPLICA_PIN_SECONDS секунд
+    ReplicaReadMixin не отправляет его запросы в реплики.
+    """
+
+    def process_response(self, request, response):
+        if (settings.BLOG_READ_REPLICAS
+                and request.method not in ('GET', 'HEAD', 'OPTIONS')):
+            response.set_cookie(
+                REPLICA_PIN_COOKIE, '1',
+                max_age=settings.BLOG_REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax')
+        return response
+
+
+class QueryBudgetMiddleware:
+    """Проверка числа и времени запросов к базе для каждой страницы.
+
+    Бюджет страницы берётся из BLOG_QUERY_BUDGETS по имени URL.
+    Превышение пишется в журнал blog.querybudget со стеком вызовов
+    лишних и самых медленных запросов. При BLOG_QUERY_BUDGET_STRICT
+    превышение числа запросов вызывает QueryBudgetExceeded, а время,
+    зависящее от нагрузки на машину, только пишется в журнал. Запросы
+    потоковых ответов досчитываются, пока ответ отдаётся.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        counter = request.query_counter = QueryCounter().start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            counter.stop()
+            raise
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.count_stream(
+                response.streaming_content, request, counter)
+        else:
+            self.check(request, counter)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_counter.max_queries = get_budget(
+            request.resolver_match.view_name)[0]
+
+    def count_stream(self, chunks, request, counter):
+        try:
+            yield from chunks
+        except BaseException:
+            counter.stop()
+            raise
+        self.check(request, counter)
+
+    @staticmethod
+    def check(request, counter):
+        counter.stop()
+        resolver_match = request.resolver_match
+        view_name = resolver_match.view_name if resolver_match else None
+        violation = counter.violation(view_name)
+        if violation is None:
+            return
+        if (settings.BLOG_QUERY_BUDGET_STRICT
+                and counter.over_query_limit(view_name)):
+            raise QueryBudgetExceeded(violation)
+        logger.warning(violation)
@@ -1,8 +1,16 @@
+from django.conf import settings
 from django.contrib.auth.mixins import UserPassesTestMixin
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
+from django.template import engines
 from django.urls import reverse
 
 from .models import Comment, Post
+from .constants import REPLICA_PIN_COOKIE
+from .pagecache import fill_holes, page_cache_key
+from .routers import reading_replica, replica_stream, use_replica
+from .streaming import stream_template
 
 
 class OnlyAuthorMixin(UserPassesTestMixin):
@@ -41,3 +49,115 @@ class PostMixin:
 
     def get_success_url(self):
         return reverse('blog:profile', args=[self.request.user.username])
+
+
+class ImageUploadMixin:
+    """Передача в форму ошибок, найденных при потоковой загрузке."""
+
+    def get_form_kwargs(self):
+        return {
+            **super().get_form_kwargs(),
+            'upload_errors': getattr(self.request, 'upload_errors', {}),
+        }
+
+
+class TemplateEngineMixin:
+    """Движок шаблонов страницы из BLOG_TEMPLATE_ENGINES.
+
+    Если движок не настроен (например, не установлен jinja2),
+    используется движок по умолчанию.
+    """
+
+    @property
+    def template_engine(self):
+        engine = settings.BLOG_TEMPLATE_ENGINES.get(
+            self.request.resolver_match.view_name)
+        return engine if engine in engines.templates else None
+
+
+class PageCacheMixin:
+    """Кеширование страницы на BLOG_PAGE_CACHE_TIMEOUT секунд.
+
+    В кеш попадает страница без персональных фрагментов (см.
+    blog.pagecache); они дорисовываются для каждого запроса, поэтому
+    кеш общий для анонимных и вошедших пользователей.
+    """
+
+    hole_punching = False
+
+    def bypass_page_cache(self):
+        """Страница с содержимым, видимым только этому пользователю."""
+        return False
+
+    def get_context_data(self, **kwargs):
+        return super().get_context_data(
+            **kwargs, hole_punching=self.hole_punching)
+
+    def get(self, request, *args, **kwargs):
+        timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+        # После записи пользователь должен видеть свои изменения, а не
+        # страницу, закешированную до них или из отстающей реплики.
+        if (not timeout or self.bypass_page_cache()
+                or REPLICA_PIN_COOKIE in request.COOKIES):
+            return super().get(request, *args, **kwargs)
+        key = page_cache_key(
+            request.get_full_path(), getattr(self, 'template_engine', None),
+            source='replica' if reading_replica() else 'default')
+        body = cache.get(key)
+        if body is None:
+            self.hole_punching = True
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            body = response.render().content.decode()
+            cache.set(key, body, timeout)
+        response = HttpResponse(fill_holes(body, request))
+        if not request.user.is_authenticated:
+            # Страница анонимного пользователя одинакова для всех,
+            # её сжатый вариант можно кешировать.
+            response.page_cache_timeout = timeout
+        return response
+
+
+class StreamingRenderMixin:
+    """Потоковая отдача страницы при BLOG_STREAMING_RENDER.
+
+    Начало страницы уходит клиенту до выборки публикаций и
+    комментариев (см. blog.streaming). Страница, которая
+    сохраняется в кеш страниц, рендерится целиком.
+    """
+
+    def render_to_response(self, context, **response_kwargs):
+        if not settings.BLOG_STREAMING_RENDER or getattr(
+                self, 'hole_punching', False):
+            return super().render_to_response(context, **response_kwargs)
+        return StreamingHttpResponse(
+            stream_template(self.get_template_names(), context,
+                            self.request, using=self.template_engine),
+            **response_kwargs,
+        )
+
+
+class ReplicaReadMixin:
+    """Чтение страницы из реплики базы данных.
+
+    Не используется для пользователя, который только что что-то
+    записал (cookie REPLICA_PIN_COOKIE от ReplicaPinMiddleware), —
+    он должен сразу видеть свои изменения.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        if (request.method not in ('GET', 'HEAD')
+                or not settings.BLOG_READ_REPLICAS
+                or REPLICA_PIN_COOKIE in request.COOKIES):
+            return super().dispatch(request, *args, **kwargs)
+        # Сессия и пользователь читаются из основной базы.
+        request.user.is_authenticated
+        with use_replica():
+            response = super().dispatch(request, *args, **kwargs)
+            if response.streaming:
+                response.streaming_content = replica_stream(
+                    response.streaming_content)
+            elif hasattr(response, 'render'):
+                response.render()
+        return response
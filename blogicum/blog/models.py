@@ -1,5 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+
+from .images import (
+    build_placeholder, post_image_upload_to, save_post_image
+)
+from .storage import post_images_storage
+from .utils import fast_reverse
 
 
 User = get_user_model()
@@ -20,6 +27,8 @@ class PublishedModel(models.Model):
 
 
 class Category(PublishedModel):
+    """Категория; при сохранении пересчитывается Post.is_visible."""
+
     title = models.CharField(max_length=256, verbose_name='Заголовок')
     description = models.TextField(verbose_name='Описание')
     slug = models.SlugField(
@@ -37,8 +46,27 @@ class Category(PublishedModel):
     def __str__(self):
         return self.title[:20]
 
+    def get_absolute_url(self):
+        return fast_reverse('blog:category_posts', self.slug)
+
+    def save(self, *args, **kwargs):
+        # До save(): сигнал после сохранения сбрасывает кеш страниц.
+        # Оба шага в одной транзакции, чтобы флаги публикаций не
+        # разошлись с категорией, если сохранение не удастся.
+        with transaction.atomic():
+            if self.pk is not None:
+                posts = Post.all_objects.filter(category_id=self.pk)
+                if self.is_published:
+                    posts.exclude(is_visible=F('is_published')).update(
+                        is_visible=F('is_published'))
+                else:
+                    posts.filter(is_visible=True).update(is_visible=False)
+            super().save(*args, **kwargs)
+
 
 class Location(PublishedModel):
+    """Место; при сохранении пересчитывается Post.visible_location."""
+
     name = models.CharField(max_length=256, verbose_name='Название места')
 
     class Meta:
@@ -49,6 +77,23 @@ class Location(PublishedModel):
     def __str__(self):
         return self.name[:20]
 
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.is_published and self.pk is not None:
+                Post.all_objects.filter(location_id=self.pk).exclude(
+                    visible_location_id=self.pk).update(visible_location=self)
+            elif self.pk is not None:
+                Post.all_objects.filter(visible_location_id=self.pk).update(
+                    visible_location=None)
+            super().save(*args, **kwargs)
+
+
+class PostManager(models.Manager):
+    """Публикации без удалённых; их строки убирает purge_deleted."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
 
 class Post(PublishedModel):
     title = models.CharField(max_length=256, verbose_name='Заголовок')
@@ -76,19 +121,98 @@ class Post(PublishedModel):
         verbose_name='Категория',
     )
     image = models.ImageField(
-        upload_to='posts_images', null=True, blank=True,
+        upload_to=post_image_upload_to, storage=post_images_storage,
+        null=True, blank=True,
         verbose_name='Изображение'
     )
+    image_meta = models.JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name='Параметры изображения',
+        help_text='Ширина, высота, размер в байтах и формат, '
+                  'сохранённые при загрузке.')
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Заглушка изображения',
+        help_text='Размытая миниатюра в виде data URI, '
+                  'показывается до загрузки изображения.')
+    is_visible = models.BooleanField(
+        default=True,
+        editable=False,
+        verbose_name='Видна всем',
+        help_text='Опубликованы и публикация, и её категория.')
+    visible_location = models.ForeignKey(
+        Location,
+        null=True,
+        on_delete=models.SET_NULL,
+        editable=False,
+        related_name='+',
+        verbose_name='Видимое местоположение',
+        help_text='Местоположение, если оно опубликовано.')
+    deleted_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        db_index=True,
+        verbose_name='Удалено',
+        help_text='Публикация скрыта и будет удалена purge_deleted.')
+
+    objects = PostManager()
+    all_objects = models.Manager()
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         default_related_name = 'posts'
         ordering = ('-pub_date', )
+        indexes = [
+            models.Index(fields=('is_visible', '-pub_date'),
+                         name='blog_post_visible_idx'),
+        ]
 
     def __str__(self):
         return self.title[:100]
 
+    def get_absolute_url(self):
+        return fast_reverse('blog:post_detail', self.pk)
+
+    @property
+    def edit_url(self):
+        return fast_reverse('blog:edit_post', self.pk)
+
+    @property
+    def delete_url(self):
+        return fast_reverse('blog:delete_post', self.pk)
+
+    @property
+    def image_width(self):
+        return self.image_meta.get('width')
+
+    @property
+    def image_height(self):
+        return self.image_meta.get('height')
+
+    @property
+    def webp_url(self):
+        if self.image and self.image_meta.get('webp'):
+            return self.image.storage.url(self.image_meta['webp'])
+        return None
+
+    def save(self, *args, **kwargs):
+        if not self.image:
+            self.image_meta = {}
+            self.image_placeholder = ''
+        elif not self.image._committed:
+            self.image_placeholder = build_placeholder(self.image.file)
+            self.image_meta = save_post_image(self.image)
+        self.is_visible = self.is_published and self.category.is_published
+        self.visible_location = (
+            self.location if self.location and self.location.is_published
+            else None)
+        super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     text = models.TextField(verbose_name='Текст комментария')
@@ -113,3 +237,114 @@ class Comment(models.Model):
 
     def __str__(self):
         return self.text[:15]
+
+    def get_absolute_url(self):
+        return fast_reverse(
+            'blog:post_detail', self.post_id) + f'#comment_{self.pk}'
+
+    @property
+    def edit_url(self):
+        return fast_reverse('blog:edit_comment', self.post_id, self.pk)
+
+    @property
+    def delete_url(self):
+        return fast_reverse('blog:delete_comment', self.post_id, self.pk)
+
+
+class PostSearchIndex(models.Model):
+    """Строка полнотекстового индекса FTS5 публикации.
+
+    Таблицу и триггеры создаёт blog.search.install_search_index(),
+    поэтому модель не управляется миграциями. Через неё
+    search_posts() присоединяет индекс к публикациям обычным JOIN.
+    document — скрытый столбец с именем таблицы для MATCH, rank —
+    скрытый столбец с оценкой совпадения.
+    """
+
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.DO_NOTHING,
+        primary_key=True,
+        db_column='rowid',
+        related_name='search_index',
+    )
+    document = models.TextField(db_column='blog_post_fts')
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'blog_post_fts'
+
+
+class UserDeletion(models.Model):
+    """Пользователь, удаление которого запланировано.
+
+    Пользователь уже не может войти, его публикации и комментарии
+    скрыты; строки удаляет purge_deleted.
+    """
+
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='deletion',
+    )
+    requested_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'удаление пользователя'
+        verbose_name_plural = 'Удаления пользователей'
+
+    def __str__(self):
+        return str(self.user_id)
+
+
+class ArchivedPost(models.Model):
+    """Публикация, перенесённая в архив командой archive_posts.
+
+    Архив может лежать в отдельной базе (BLOG_ARCHIVE_DATABASE),
+    поэтому вместо внешних ключей на автора, категорию и место
+    хранятся их идентификаторы.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    is_published = models.BooleanField()
+    created_at = models.DateTimeField()
+    title = models.CharField(max_length=256)
+    text = models.TextField()
+    pub_date = models.DateTimeField()
+    author_id = models.BigIntegerField(db_index=True)
+    location_id = models.BigIntegerField(null=True)
+    category_id = models.BigIntegerField()
+    image = models.CharField(max_length=100, blank=True)
+    image_meta = models.JSONField(default=dict)
+    image_placeholder = models.TextField(blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'архивная публикация'
+        verbose_name_plural = 'Архивные публикации'
+        ordering = ('-pub_date', )
+
+    def __str__(self):
+        return self.title[:100]
+
+
+class ArchivedComment(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    text = models.TextField()
+    author_id = models.BigIntegerField()
+    post = models.ForeignKey(
+        ArchivedPost,
+        on_delete=models.CASCADE,
+        related_name='comments',
+    )
+    created_at = models.DateTimeField()
+
+    class Meta:
+        verbose_name = 'архивный комментарий'
+        verbose_name_plural = 'Архивные комментарии'
+        ordering = ('created_at',)
+
+    def __str__(self):
+        return self.text[:15]
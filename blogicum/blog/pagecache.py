@@ -0,0 +1,69 @@
+# blog/pagecache.py
+"""Кеш страниц с «дырами» под персональные фрагменты.
+
+Общая часть страницы кешируется один раз; шапка с именем пользователя
+и форма комментария с CSRF-токеном остаются в ней метками вида
+<!--hole:header--> и заполняются при каждом запросе.
+"""
+import hashlib
+import re
+import time
+
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+GENERATION_KEY = 'blog:page-generation'
+HOLE_PATTERN = re.compile(r'<!--hole:(?P<name>\w+)(?::(?P<arg>[\w-]*))?-->')
+
+
+def page_generation():
+    return cache.get_or_set(GENERATION_KEY, time.time_ns, None)
+
+
+def bump_page_generation():
+    """Сброс всех закешированных страниц после изменения данных."""
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), None)
+
+
+def page_cache_key(path, engine=None, source='default'):
+    """Ключ страницы; source — база, из которой она отрисована.
+
+    Страницы из реплик хранятся отдельно: они могут отставать от
+    основной базы.
+    """
+    digest = hashlib.md5(
+        f'{source}:{engine}:{path}'.encode(),
+        usedforsecurity=False).hexdigest()
+    return f'blog:page:{page_generation()}:{digest}'
+
+
+def hole_marker(name, arg=''):
+    return mark_safe(f'<!--hole:{name}:{arg}-->' if arg != ''
+                     else f'<!--hole:{name}-->')
+
+
+def render_header(request, arg):
+    return render_to_string('includes/header.html', request=request)
+
+
+def render_comment_form(request, post_id):
+    from .forms import CommentForm
+    return render_to_string(
+        'includes/comment_form.html',
+        {'post_id': post_id, 'form': CommentForm()}, request)
+
+
+HOLE_RENDERERS = {
+    'header': render_header,
+    'comment_form': render_comment_form,
+}
+
+
+def fill_holes(body, request):
+    return HOLE_PATTERN.sub(
+        lambda match: HOLE_RENDERERS[match['name']](request, match['arg']),
+        body)
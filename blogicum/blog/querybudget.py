@@ -0,0 +1,128 @@
+# blog/querybudget.py
+"""Бюджет запросов к базе на обработку одного HTTP-запроса.
+
+QueryCounter считает запросы ко всем базам и их суммарное время как
+обёртка connection.execute_wrappers. QueryBudgetMiddleware сравнивает итог
+с бюджетом страницы из BLOG_QUERY_BUDGETS.
+"""
+import heapq
+import logging
+import traceback
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connections
+
+from .constants import QUERY_BUDGET_SLOWEST
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_budget(view_name):
+    """Число запросов и время в миллисекундах для страницы view_name.
+
+    Бюджет ищется по имени URL, затем по его пространству имён.
+    """
+    budgets = settings.BLOG_QUERY_BUDGETS
+    namespace = (view_name or '').rpartition(':')[0]
+    return budgets.get(view_name) or budgets.get(
+        namespace, settings.BLOG_QUERY_BUDGET)
+
+
+def project_frames(stack):
+    """Кадры стека из кода проекта, без Django и самого счётчика."""
+    root = str(settings.BASE_DIR)
+    return [frame for frame in stack
+            if frame.filename.startswith(root)
+            and frame.filename != __file__]
+
+
+class QueryCounter:
+    """Счётчик запросов и их времени.
+
+    Стек вызовов запоминается для запросов сверх max_queries и для
+    QUERY_BUDGET_SLOWEST самых медленных запросов: отчёт о превышении
+    времени тоже показывает, откуда пришли запросы. Стек снимается,
+    только когда запрос попадает в число самых медленных, так что
+    в пределах бюджета подсчёт почти ничего не стоит.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.max_queries = None
+        self.over_budget = []
+        self.slowest = []
+        self.connections = []
+
+    def start(self):
+        # Не execute_wrapper(): потоковый ответ досчитывается после
+        # выхода из middleware, и обёртки снимаются не в порядке стека.
+        self.connections = connections.all()
+        for connection in self.connections:
+            connection.execute_wrappers.append(self)
+        return self
+
+    def stop(self):
+        for connection in self.connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+        self.connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.duration += elapsed
+            self.count += 1
+            if self.max_queries is not None and (
+                    self.count > self.max_queries):
+                self.over_budget.append(
+                    (sql, project_frames(traceback.extract_stack())))
+            self.remember_slow(elapsed, sql)
+
+    def remember_slow(self, elapsed, sql):
+        if len(self.slowest) < QUERY_BUDGET_SLOWEST:
+            push = heapq.heappush
+        elif elapsed > self.slowest[0][0]:
+            push = heapq.heapreplace
+        else:
+            return
+        # Номер запроса разводит запросы одинаковой длительности,
+        # чтобы heapq не сравнивал стеки.
+        push(self.slowest, (
+            elapsed, self.count, sql,
+            project_frames(traceback.extract_stack()),
+        ))
+
+    def over_query_limit(self, view_name):
+        return self.count > get_budget(view_name)[0]
+
+    def violation(self, view_name):
+        """Описание превышения бюджета или None."""
+        max_queries, max_ms = get_budget(view_name)
+        duration_ms = self.duration * 1000
+        if self.count <= max_queries and duration_ms <= max_ms:
+            return None
+        lines = [
+            f'{view_name or "без имени URL"}: {self.count} запросов к базе '
+            f'за {duration_ms:.0f} мс, бюджет — {max_queries} запросов '
+            f'и {max_ms} мс.'
+        ]
+        for sql, stack in self.over_budget:
+            lines.append(f'Запрос сверх бюджета: {sql}')
+            lines.extend(
+                line.rstrip() for line in traceback.format_list(stack))
+        if duration_ms > max_ms:
+            for elapsed, _, sql, stack in sorted(self.slowest, reverse=True):
+                lines.append(
+                    f'Медленный запрос ({elapsed * 1000:.1f} мс): {sql}')
+                lines.extend(
+                    line.rstrip() for line in traceback.format_list(stack))
+        return '\n'.join(lines)
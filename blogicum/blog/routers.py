@@ -0,0 +1,110 @@
+# blog/routers.py
+"""Чтение страниц блога из реплик и архив в отдельной базе данных."""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+read_from_replica = ContextVar('read_from_replica', default=False)
+ARCHIVE_MODELS = {'blog.archivedpost', 'blog.archivedcomment'}
+
+
+@contextmanager
+def use_replica():
+    """Чтение из реплик внутри блока (см. ReplicaRouter)."""
+    token = read_from_replica.set(True)
+    try:
+        yield
+    finally:
+        read_from_replica.reset(token)
+
+
+def replica_stream(chunks):
+    """Потоковое содержимое, которое при генерации читает из реплик."""
+    with use_replica():
+        yield from chunks
+
+
+def reading_replica():
+    """Идёт ли чтение из реплик (внутри use_replica())."""
+    return read_from_replica.get() and bool(settings.BLOG_READ_REPLICAS)
+
+
+def choose_replica():
+    return random.choice(settings.BLOG_READ_REPLICAS)
+
+
+def refresh_replicas(aliases=None):
+    """Копирование основной базы SQLite в реплики через backup API.
+
+    Годится для локальной проверки: реплика — второй файл SQLite или
+    база в памяти (file:replica?mode=memory&cache=shared), которую
+    нужно обновлять в том же процессе.
+    """
+    source = connections['default']
+    source.ensure_connection()
+    for alias in aliases or settings.BLOG_READ_REPLICAS:
+        target = connections[alias]
+        if source.vendor != 'sqlite' or target.vendor != 'sqlite':
+            raise ValueError(
+                f'Копировать можно только SQLite в SQLite, не {alias}.')
+        target.ensure_connection()
+        source.connection.backup(target.connection)
+
+
+class ReplicaRouter:
+    """Чтение внутри use_replica() — из BLOG_READ_REPLICAS.
+
+    Запись и остальное чтение идут в default. Реплики — копии основной
+    базы, поэтому миграции к ним не применяются.
+    """
+
+    def db_for_read(self, model, **hints):
+        if reading_replica():
+            return choose_replica()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *settings.BLOG_READ_REPLICAS}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.BLOG_READ_REPLICAS:
+            return False
+        return None
+
+
+class ArchiveRouter:
+    """Архивные публикации и комментарии — в BLOG_ARCHIVE_DATABASE.
+
+    Стоит в DATABASE_ROUTERS перед ReplicaRouter. Если архив вынесен
+    в отдельную базу, другие таблицы в ней не создаются.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in ARCHIVE_MODELS:
+            return settings.BLOG_ARCHIVE_DATABASE
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_relation(self, obj1, obj2, **hints):
+        labels = {obj1._meta.label_lower, obj2._meta.label_lower}
+        if labels <= ARCHIVE_MODELS:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        archive = settings.BLOG_ARCHIVE_DATABASE
+        if f'{app_label}.{model_name}' in ARCHIVE_MODELS:
+            return db == archive
+        if db == archive and archive != 'default':
+            return False
+        return None
@@ -0,0 +1,147 @@
+# blog/search.py
+"""Полнотекстовый поиск публикаций через индекс FTS5 в SQLite.
+
+Индекс хранит только токены заголовка и текста (external content):
+сами строки берутся из таблицы публикаций, а триггеры обновляют
+индекс при вставке, изменении и удалении публикаций.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Lookup, Q
+
+from .constants import SEARCH_MAX_TERMS, SEARCH_WEIGHTS
+from .models import Post, PostSearchIndex
+
+FTS_TABLE = PostSearchIndex._meta.db_table
+SEARCH_TERM = re.compile(r'\w+')
+
+
+class Match(Lookup):
+    """Оператор MATCH FTS5: запрос к индексу или выбор функции rank.
+
+    Правая часть передаётся как есть, без приведения к типу поля.
+    """
+
+    lookup_name = 'match'
+    prepare_rhs = False
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', [*lhs_params, *rhs_params]
+
+
+for field_name in ('document', 'rank'):
+    PostSearchIndex._meta.get_field(field_name).register_lookup(Match)
+
+
+def index_statements(post_table=Post._meta.db_table, fts_table=FTS_TABLE):
+    """SQL таблицы индекса и триггеров, которые держат её в актуальном виде.
+
+    Вынесено в функцию, чтобы bench_search строил тот же индекс
+    во временной базе.
+    """
+    columns = 'title, text'
+    values = 'new.title, new.text'
+    old_values = "'delete', old.id, old.title, old.text"
+    return {
+        fts_table: (
+            f'CREATE VIRTUAL TABLE {fts_table} USING fts5('
+            f"{columns}, content='{post_table}', content_rowid='id', "
+            f"tokenize='unicode61 remove_diacritics 2')"
+        ),
+        f'{fts_table}_ai': (
+            f'CREATE TRIGGER {fts_table}_ai AFTER INSERT ON {post_table} '
+            f'BEGIN INSERT INTO {fts_table}(rowid, {columns}) '
+            f'VALUES (new.id, {values}); END'
+        ),
+        f'{fts_table}_ad': (
+            f'CREATE TRIGGER {fts_table}_ad AFTER DELETE ON {post_table} '
+            f'BEGIN INSERT INTO {fts_table}({fts_table}, rowid, {columns}) '
+            f'VALUES ({old_values}); END'
+        ),
+        f'{fts_table}_au': (
+            f'CREATE TRIGGER {fts_table}_au '
+            f'AFTER UPDATE OF title, text ON {post_table} '
+            f'BEGIN INSERT INTO {fts_table}({fts_table}, rowid, {columns}) '
+            f'VALUES ({old_values}); '
+            f'INSERT INTO {fts_table}(rowid, {columns}) '
+            f'VALUES (new.id, {values}); END'
+        ),
+    }
+
+
+def install_search_index(cursor, post_table=Post._meta.db_table,
+                         fts_table=FTS_TABLE):
+    """Создание недостающих таблицы индекса и триггеров.
+
+    Если чего-то не хватало, индекс мог отстать от публикаций,
+    поэтому он перестраивается. Возвращает True, если что-то создано.
+    """
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger') "
+        f"AND name LIKE '{fts_table}%'")
+    existing = {name for name, in cursor.fetchall()}
+    missing = {
+        name: sql
+        for name, sql in index_statements(post_table, fts_table).items()
+        if name not in existing
+    }
+    for sql in missing.values():
+        cursor.execute(sql)
+    if missing:
+        rebuild_search_index(cursor, fts_table)
+    return bool(missing)
+
+
+def drop_search_triggers(cursor, fts_table=FTS_TABLE):
+    """Отключение обновления индекса на время массовой загрузки.
+
+    install_search_index() потом вернёт триггеры и перестроит индекс.
+    """
+    for name in index_statements(fts_table=fts_table):
+        if name != fts_table:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {name}')
+
+
+def rebuild_search_index(cursor, fts_table=FTS_TABLE):
+    cursor.execute(
+        f"INSERT INTO {fts_table}({fts_table}) VALUES ('rebuild')")
+
+
+def match_expression(query):
+    """Запрос пользователя в синтаксисе MATCH.
+
+    Слова берутся в кавычки, чтобы операторы FTS5 во вводе не
+    разбирались; последнее слово ищется как префикс.
+    """
+    terms = SEARCH_TERM.findall(query)[:SEARCH_MAX_TERMS]
+    if not terms:
+        return ''
+    return ' '.join(f'"{term}"' for term in terms) + '*'
+
+
+def search_posts(posts, query):
+    """Публикации из posts, подходящие под запрос, лучшие первыми.
+
+    Без FTS5 (другая СУБД) — поиск подстроки без ранжирования.
+    """
+    match = match_expression(query)
+    if not match:
+        return posts.none()
+    if connections[posts.db].vendor != 'sqlite':
+        terms = SEARCH_TERM.findall(query)[:SEARCH_MAX_TERMS]
+        for term in terms:
+            posts = posts.filter(
+                Q(title__icontains=term) | Q(text__icontains=term))
+        return posts
+    weights = ', '.join(str(weight) for weight in SEARCH_WEIGHTS)
+    # Индекс присоединяется к публикациям, а не проверяется подзапросом
+    # для каждой строки: так MATCH выполняется один раз. Оценка берётся
+    # из скрытого столбца rank, а не из bm25(): вспомогательные функции
+    # FTS5 нельзя использовать в GROUP BY, который добавляет Count().
+    return posts.filter(
+        search_index__document__match=match,
+        search_index__rank__match=f'bm25({weights})',
+    ).order_by('search_index__rank', *Post._meta.ordering)
@@ -0,0 +1,91 @@
+# blog/signals.py
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import connections, router, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (
+    post_delete, post_migrate, post_save, pre_save
+)
+from django.dispatch import receiver
+
+from .images import stored_files
+from .models import Category, Comment, Location, Post, User
+from .pagecache import bump_page_generation
+from .search import install_search_index
+from .utils import url_template
+
+
+def cleanup_enabled():
+    return settings.MEDIA_CLEANUP_ON_COMMIT
+
+
+def delete_files_on_commit(storage, names):
+    """Удаление файлов после успешной фиксации транзакции."""
+    def delete():
+        for name in names:
+            storage.delete(name)
+    transaction.on_commit(delete)
+
+
+@receiver(pre_save, sender=Post)
+def remember_replaced_image(sender, instance, **kwargs):
+    if not cleanup_enabled() or instance.pk is None:
+        return
+    instance._replaced_image = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list('image', 'image_meta').first()
+    )
+
+
+@receiver(post_save, sender=Post)
+def delete_replaced_image(sender, instance, **kwargs):
+    replaced = getattr(instance, '_replaced_image', None)
+    if replaced and replaced[0] != instance.image.name:
+        delete_files_on_commit(
+            instance.image.storage, stored_files(*replaced))
+    instance._replaced_image = None
+
+
+@receiver(post_delete, sender=Post)
+def delete_post_image(sender, instance, **kwargs):
+    if cleanup_enabled() and instance.image:
+        delete_files_on_commit(
+            instance.image.storage,
+            stored_files(instance.image.name, instance.image_meta))
+
+
+@receiver(setting_changed)
+def clear_url_templates(setting, **kwargs):
+    if setting == 'ROOT_URLCONF':
+        url_template.cache_clear()
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_pages(sender, using, update_fields=None, **kwargs):
+    if sender not in (Category, Comment, Location, Post, User):
+        return
+    if update_fields == {'last_login'}:
+        return  # Вход пользователя не меняет страницы.
+    # После фиксации: иначе параллельный запрос успеет закешировать
+    # страницу со старыми данными под новым поколением.
+    transaction.on_commit(bump_page_generation, using=using)
+
+
+@receiver(connection_created)
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(post_migrate)
+def create_search_index(sender, using, **kwargs):
+    connection = connections[using]
+    if (sender.name != 'blog' or connection.vendor != 'sqlite'
+            or not router.allow_migrate_model(using, Post)):
+        return
+    with connection.cursor() as cursor:
+        install_search_index(cursor)
@@ -0,0 +1,432 @@
+# blog/storage.py
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import stat
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import quote, urljoin
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core import signing
+from django.core.cache import caches
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files import File
+from django.core.files.storage import Storage, storages
+from django.urls import reverse
+from django.utils.deconstruct import deconstructible
+from django.utils.module_loading import import_string
+
+from .constants import (
+    COMPRESSIBLE_STATIC, MULTIPART_CHUNK_SIZE, MULTIPART_THRESHOLD,
+    OBJECT_UPLOAD_SALT, PRESIGNED_URL_EXPIRES
+)
+from .utils import brotli
+
+
+def post_images_storage():
+    return storages['post_images']
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+class LimitedReader:
+    """Поток, чтение из которого прерывается после limit байт.
+
+    Заголовку Content-Length верить нельзя: тело может прийти частями
+    (chunked) или оказаться длиннее заявленного.
+    """
+
+    def __init__(self, stream, limit):
+        self.stream = stream
+        self.limit = limit
+        self.received = 0
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            size = self.limit - self.received + 1
+        data = self.stream.read(size)
+        self.received += len(data)
+        if self.received > self.limit:
+            raise UploadTooLarge
+        return data
+
+
+class LocalObjectClient:
+    """Локальная замена объектного хранилища для разработки и тестов.
+
+    Объекты лежат файлами в root (по умолчанию MEDIA_ROOT), но доступны
+    только через API объектного хранилища: плоские ключи, атомарная
+    запись целиком, составная загрузка частями и подписанные ссылки
+    на прямую загрузку, которые принимает представление
+    blog:object_upload.
+    """
+
+    multipart_dir = '.multipart'
+
+    def __init__(self, root=None):
+        self._root = root
+
+    @property
+    def root(self):
+        return Path(self._root or settings.MEDIA_ROOT)
+
+    @property
+    def identity(self):
+        return f'local:{self.root}'
+
+    def _path(self, key):
+        return self.root / key
+
+    def _write_atomic(self, key, write):
+        """Запись во временный файл рядом и замена одним rename."""
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+                dir=path.parent, prefix='.upload-', delete=False) as tmp:
+            try:
+                write(tmp)
+            except BaseException:
+                tmp.close()
+                os.unlink(tmp.name)
+                raise
+        os.chmod(tmp.name, settings.FILE_UPLOAD_PERMISSIONS or 0o644)
+        os.replace(tmp.name, path)
+
+    def put_object(self, key, body, content_type=None):
+        self._write_atomic(key, lambda tmp: shutil.copyfileobj(body, tmp))
+
+    def get_object(self, key):
+        return open(self._path(key), 'rb')
+
+    def get_object_range(self, key, length):
+        with open(self._path(key), 'rb') as file:
+            return file.read(length)
+
+    def head_object(self, key):
+        try:
+            info = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        if not stat.S_ISREG(info.st_mode):
+            return None
+        return {
+            'size': info.st_size,
+            'last_modified': info.st_mtime,
+            'etag': f'{info.st_mtime_ns:x}-{info.st_size:x}',
+            'content_type': mimetypes.guess_type(key)[0],
+        }
+
+    def delete_object(self, key):
+        self._path(key).unlink(missing_ok=True)
+
+    def list_objects(self, prefix):
+        """Ключи и «каталоги» непосредственно под префиксом."""
+        path = self._path(prefix)
+        directories, keys = [], []
+        if not path.is_dir():
+            return directories, keys
+        for entry in os.scandir(path):
+            if entry.name.startswith('.'):
+                continue
+            (directories if entry.is_dir() else keys).append(entry.name)
+        return directories, keys
+
+    def create_multipart_upload(self, key, content_type=None):
+        upload_id = uuid4().hex
+        (self.root / self.multipart_dir / upload_id).mkdir(parents=True)
+        return upload_id
+
+    def upload_part(self, key, upload_id, part_number, data):
+        part = self.root / self.multipart_dir / upload_id / f'{part_number}'
+        part.write_bytes(data)
+        return hashlib.md5(data, usedforsecurity=False).hexdigest()
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        upload_dir = self.root / self.multipart_dir / upload_id
+
+        def write(tmp):
+            for part_number, _ in parts:
+                with open(upload_dir / f'{part_number}', 'rb') as part:
+                    shutil.copyfileobj(part, tmp)
+
+        self._write_atomic(key, write)
+        shutil.rmtree(upload_dir)
+
+    def abort_multipart_upload(self, key, upload_id):
+        shutil.rmtree(
+            self.root / self.multipart_dir / upload_id, ignore_errors=True)
+
+    def url(self, key):
+        return urljoin(settings.MEDIA_URL, quote(key))
+
+    def presigned_put(self, key, content_type, expires):
+        token = signing.dumps(
+            {'key': key, 'content_type': content_type,
+             'expires': int(time.time()) + expires},
+            salt=OBJECT_UPLOAD_SALT,
+        )
+        return {
+            'url': reverse('blog:object_upload', args=[token]),
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type},
+        }
+
+    @staticmethod
+    def load_presigned_key(token):
+        """Ключ из подписанной ссылки или None, если ссылка недействительна."""
+        try:
+            payload = signing.loads(token, salt=OBJECT_UPLOAD_SALT)
+        except signing.BadSignature:
+            return None
+        if payload['expires'] < time.time():
+            return None
+        return payload['key']
+
+
+class S3ObjectClient:
+    """Клиент S3-совместимого хранилища; требует пакет boto3."""
+
+    def __init__(self, bucket, endpoint_url=None, region_name=None,
+                 access_key=None, secret_key=None, base_url=None):
+        try:
+            import boto3
+        except ImportError:
+            raise ImproperlyConfigured(
+                'Для S3ObjectClient установите пакет boto3.')
+        self.bucket = bucket
+        self.base_url = base_url
+        self.client = boto3.client(
+            's3', endpoint_url=endpoint_url, region_name=region_name,
+            aws_access_key_id=access_key, aws_secret_access_key=secret_key,
+        )
+
+    @property
+    def identity(self):
+        return f's3:{self.client.meta.endpoint_url}/{self.bucket}'
+
+    def put_object(self, key, body, content_type=None):
+        self.client.put_object(
+            Bucket=self.bucket, Key=key, Body=body,
+            ContentType=content_type or 'application/octet-stream')
+
+    def get_object(self, key):
+        body = tempfile.SpooledTemporaryFile(max_size=MULTIPART_CHUNK_SIZE)
+        self.client.download_fileobj(self.bucket, key, body)
+        body.seek(0)
+        return body
+
+    def get_object_range(self, key, length):
+        return self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f'bytes=0-{length - 1}',
+        )['Body'].read()
+
+    def head_object(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as error:
+            if error.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return {
+            'size': head['ContentLength'],
+            'last_modified': head['LastModified'].timestamp(),
+            'etag': head['ETag'].strip('"'),
+            'content_type': head.get('ContentType'),
+        }
+
+    def delete_object(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def list_objects(self, prefix):
+        directories, keys = [], []
+        prefix = f'{prefix.rstrip("/")}/' if prefix else ''
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(
+                Bucket=self.bucket, Prefix=prefix, Delimiter='/'):
+            for common in page.get('CommonPrefixes', []):
+                directories.append(
+                    common['Prefix'][len(prefix):].rstrip('/'))
+            for item in page.get('Contents', []):
+                keys.append(item['Key'][len(prefix):])
+        return directories, keys
+
+    def create_multipart_upload(self, key, content_type=None):
+        return self.client.create_multipart_upload(
+            Bucket=self.bucket, Key=key,
+            ContentType=content_type or 'application/octet-stream',
+        )['UploadId']
+
+    def upload_part(self, key, upload_id, part_number, data):
+        return self.client.upload_part(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            PartNumber=part_number, Body=data,
+        )['ETag']
+
+    def complete_multipart_upload(self, key, upload_id, parts):
+        self.client.complete_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id,
+            MultipartUpload={'Parts': [
+                {'PartNumber': number, 'ETag': etag}
+                for number, etag in parts
+            ]},
+        )
+
+    def abort_multipart_upload(self, key, upload_id):
+        self.client.abort_multipart_upload(
+            Bucket=self.bucket, Key=key, UploadId=upload_id)
+
+    def url(self, key):
+        if self.base_url:
+            return urljoin(self.base_url, quote(key))
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': self.bucket, 'Key': key})
+
+    def presigned_put(self, key, content_type, expires):
+        return {
+            'url': self.client.generate_presigned_url(
+                'put_object',
+                Params={'Bucket': self.bucket, 'Key': key,
+                        'ContentType': content_type},
+                ExpiresIn=expires,
+            ),
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type},
+        }
+
+
+@deconstructible(path='blog.storage.ObjectStorage')
+class ObjectStorage(Storage):
+    """Хранилище Django поверх объектного хранилища.
+
+    Клиент задаётся в OPTIONS: LocalObjectClient для локальной работы
+    или S3ObjectClient для S3-совместимого сервиса. Большие файлы
+    загружаются частями, результаты head-запросов кешируются.
+    """
+
+    def __init__(self, client='blog.storage.LocalObjectClient',
+                 client_options=None, metadata_cache='default',
+                 metadata_cache_timeout=300):
+        self.client = import_string(client)(**(client_options or {}))
+        self.metadata_cache = metadata_cache
+        self.metadata_cache_timeout = metadata_cache_timeout
+
+    def _cache_key(self, name):
+        digest = hashlib.md5(
+            f'{self.client.identity}:{name}'.encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        return f'blog:object-meta:{digest}'
+
+    def head(self, name):
+        """Метаданные объекта или None, если его нет.
+
+        Кешируются только найденные объекты: по подписанной ссылке
+        файл загружается в хранилище в обход forget(), и закешированный
+        промах прятал бы его до истечения кеша.
+        """
+        cache = caches[self.metadata_cache]
+        key = self._cache_key(name)
+        meta = cache.get(key)
+        if meta is None:
+            meta = self.client.head_object(name)
+            if meta:
+                cache.set(key, meta, self.metadata_cache_timeout)
+        return meta or None
+
+    def forget(self, name):
+        caches[self.metadata_cache].delete(self._cache_key(name))
+
+    def _open(self, name, mode='rb'):
+        return File(self.client.get_object(name), name)
+
+    def read_start(self, name, length):
+        """Первые length байт объекта без скачивания его целиком."""
+        return self.client.get_object_range(name, length)
+
+    def _save(self, name, content):
+        content_type = (getattr(content, 'content_type', None)
+                        or mimetypes.guess_type(name)[0])
+        if content.size > MULTIPART_THRESHOLD:
+            self._save_multipart(name, content, content_type)
+        else:
+            content.seek(0)
+            self.client.put_object(name, content, content_type)
+        self.forget(name)
+        return name
+
+    def _save_multipart(self, name, content, content_type):
+        upload_id = self.client.create_multipart_upload(name, content_type)
+        parts = []
+        try:
+            for number, chunk in enumerate(
+                    content.chunks(MULTIPART_CHUNK_SIZE), start=1):
+                parts.append((number, self.client.upload_part(
+                    name, upload_id, number, chunk)))
+            self.client.complete_multipart_upload(name, upload_id, parts)
+        except Exception:
+            self.client.abort_multipart_upload(name, upload_id)
+            raise
+
+    def delete(self, name):
+        self.client.delete_object(name)
+        self.forget(name)
+
+    def exists(self, name):
+        return self.head(name) is not None
+
+    def listdir(self, path):
+        return self.client.list_objects(path)
+
+    def size(self, name):
+        return self.head(name)['size']
+
+    def get_modified_time(self, name):
+        return datetime.fromtimestamp(
+            self.head(name)['last_modified'], tz=timezone.utc)
+
+    def url(self, name):
+        return self.client.url(name)
+
+    def presigned_upload(self, name, content_type,
+                         expires=PRESIGNED_URL_EXPIRES):
+        """Ссылка для загрузки файла клиентом напрямую в хранилище."""
+        return self.client.presigned_put(name, content_type, expires)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешем содержимого в именах и сжатыми копиями.
+
+    При collectstatic рядом с текстовыми файлами сохраняются .gz и,
+    если установлен пакет brotli, .br; их отдаёт blog:static.
+    """
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted({*paths, *self.hashed_files.values()}):
+            if name.endswith(COMPRESSIBLE_STATIC):
+                for compressed in self.compress(name):
+                    yield name, compressed, True
+
+    def compress(self, name):
+        """Запись сжатых копий, которые меньше исходного файла."""
+        path = Path(self.path(name))
+        data = path.read_bytes()
+        variants = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+        if brotli is not None:
+            variants['.br'] = brotli.compress(data)
+        for suffix, compressed in variants.items():
+            if len(compressed) < len(data):
+                path.with_name(path.name + suffix).write_bytes(compressed)
+                yield name + suffix
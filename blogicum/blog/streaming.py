@@ -0,0 +1,68 @@
+# blog/streaming.py
+"""Потоковый рендеринг страниц.
+
+Шаблон Django рендерится сначала без тел циклов {% streamfor %} —
+на их месте остаются метки. Часть до первой метки (<head> и шапка)
+отправляется сразу, а элементы циклов рендерятся по одному, так что
+запрос публикаций или комментариев выполняется уже после отправки
+начала страницы. Шаблоны Jinja2 отдаются через Template.generate().
+"""
+from itertools import chain
+
+from django.template.backends.django import Template as DjangoTemplate
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+from django.template.context import make_context
+from django.template.loader import select_template
+
+from .constants import STREAM_CHUNK_SIZE
+
+STREAM_MARKER = '<!--stream-region-->'
+
+
+def buffered(chunks, size=STREAM_CHUNK_SIZE):
+    """Объединение мелких частей в порции не меньше size символов."""
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_django_template(template, context, request):
+    regions = []
+    parts = template.render(
+        {**context, 'stream_regions': regions}, request).split(STREAM_MARKER)
+    yield parts[0]
+    django_template = template.template
+    context = make_context(context, request)
+    with context.render_context.push_state(django_template), \
+            context.bind_template(django_template):
+        yield from buffered(chain.from_iterable(
+            chain(region.stream(context), [part])
+            for region, part in zip(regions, parts[1:])
+        ))
+
+
+def stream_jinja2_template(template, context, request):
+    context = {
+        **context,
+        'request': request,
+        'csrf_input': csrf_input_lazy(request),
+        'csrf_token': csrf_token_lazy(request),
+    }
+    for context_processor in template.backend.template_context_processors:
+        context.update(context_processor(request))
+    yield from buffered(template.template.generate(context))
+
+
+def stream_template(template_names, context, request, using=None):
+    """Части страницы для StreamingHttpResponse."""
+    template = select_template(template_names, using=using)
+    if isinstance(template, DjangoTemplate):
+        return stream_django_template(template, context, request)
+    return stream_jinja2_template(template, context, request)
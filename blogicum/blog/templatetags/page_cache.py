@@ -0,0 +1,41 @@
+from django import template
+
+from blog.pagecache import HOLE_RENDERERS, hole_marker
+
+register = template.Library()
+
+
+class HoleNode(template.Node):
+
+    def __init__(self, nodelist, name, arg=None):
+        self.nodelist = nodelist
+        self.name = name
+        self.arg = arg
+
+    def render(self, context):
+        if not context.get('hole_punching'):
+            return self.nodelist.render(context)
+        return hole_marker(
+            self.name, self.arg.resolve(context) if self.arg else '')
+
+
+@register.tag
+def hole(parser, token):
+    """Персональный фрагмент страницы.
+
+    {% hole "header" %}...{% endhole %} выводит содержимое как есть,
+    а при hole_punching в контексте — метку, которую заполняет
+    blog.pagecache.fill_holes. Второй аргумент передаётся рендереру
+    фрагмента.
+    """
+    bits = token.split_contents()
+    if len(bits) not in (2, 3):
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} принимает имя фрагмента и необязательный аргумент.')
+    name = bits[1].strip('"\'')
+    if name not in HOLE_RENDERERS:
+        raise template.TemplateSyntaxError(f'Неизвестный фрагмент {name}.')
+    nodelist = parser.parse(('endhole',))
+    parser.delete_first_token()
+    arg = parser.compile_filter(bits[2]) if len(bits) == 3 else None
+    return HoleNode(nodelist, name, arg)
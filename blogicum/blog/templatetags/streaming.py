@@ -0,0 +1,49 @@
+from django import template
+from django.template.defaulttags import ForNode
+
+from blog.streaming import STREAM_MARKER
+
+register = template.Library()
+
+
+class StreamForNode(ForNode):
+    """Цикл, элементы которого при потоковом рендеринге отдаются по одному.
+
+    Вне потокового режима работает как {% for %}. Доступны
+    forloop.counter, forloop.counter0 и forloop.first; forloop.last
+    при потоковом рендеринге заранее неизвестен.
+    """
+
+    def render(self, context):
+        regions = context.get('stream_regions')
+        if regions is None:
+            return super().render(context)
+        regions.append(self)
+        return STREAM_MARKER
+
+    def stream(self, context):
+        sequence = self.sequence.resolve(context, ignore_failures=True) or []
+        parentloop = context.get('forloop', {})
+        with context.push():
+            for index, item in enumerate(sequence):
+                context['forloop'] = {
+                    'parentloop': parentloop,
+                    'counter0': index,
+                    'counter': index + 1,
+                    'first': index == 0,
+                }
+                context[self.loopvars[0]] = item
+                yield self.nodelist_loop.render(context)
+
+
+@register.tag
+def streamfor(parser, token):
+    """{% streamfor item in items %}...{% endstreamfor %}"""
+    bits = token.split_contents()
+    if len(bits) != 4 or bits[2] != 'in':
+        raise template.TemplateSyntaxError(
+            f'Используйте {{% {bits[0]} элемент in последовательность %}}.')
+    nodelist = parser.parse(('endstreamfor',))
+    parser.delete_first_token()
+    return StreamForNode(
+        [bits[1]], parser.compile_filter(bits[3]), False, nodelist)
@@ -0,0 +1,79 @@
+# blog/uploadhandlers.py
+from io import BytesIO
+
+from django.core.files.uploadhandler import (
+    SkipFile, StopFutureHandlers, TemporaryFileUploadHandler
+)
+from PIL import Image
+
+from .constants import POST_IMAGE_HEADER_LIMIT, POST_IMAGE_UPLOAD_VIEWS
+from .images import image_limits_error
+
+
+class PostImageUploadHandler(TemporaryFileUploadHandler):
+    """Потоковая загрузка изображений публикаций с ограничениями.
+
+    Файл сразу пишется во временный файл на диске. Загрузка прерывается,
+    как только превышен лимит по размеру или заголовок изображения
+    сообщает о слишком большом числе пикселей; причина сохраняется
+    в request.upload_errors и показывается формой.
+    """
+
+    def new_file(self, field_name, *args, **kwargs):
+        match = self.request.resolver_match
+        self.active = (
+            field_name == 'image'
+            and match is not None
+            and match.view_name in POST_IMAGE_UPLOAD_VIEWS
+        )
+        if not self.active:
+            return
+        super().new_file(field_name, *args, **kwargs)
+        self.received = 0
+        self.header = b''
+        # Иначе следующий TemporaryFileUploadHandler откроет второй,
+        # ненужный временный файл.
+        raise StopFutureHandlers()
+
+    def receive_data_chunk(self, raw_data, start):
+        if not self.active:
+            return raw_data
+        self.received += len(raw_data)
+        error = image_limits_error(size=self.received)
+        if error:
+            self.reject(error)
+        if self.header is not None:
+            self.check_header(raw_data)
+        self.file.write(raw_data)
+
+    def check_header(self, raw_data):
+        """Проверка числа пикселей по заголовку, без декодирования."""
+        self.header += raw_data
+        try:
+            with Image.open(BytesIO(self.header)) as image:
+                pixels = image.width * image.height
+        except Image.DecompressionBombError:
+            pixels = float('inf')
+        except OSError:
+            # Заголовок ещё не получен целиком. Если он не уместился
+            # в лимит, окончательную проверку выполнит форма.
+            if len(self.header) > POST_IMAGE_HEADER_LIMIT:
+                self.header = None
+            return
+        self.header = None
+        error = image_limits_error(pixels=pixels)
+        if error:
+            self.reject(error)
+
+    def reject(self, message):
+        if not hasattr(self.request, 'upload_errors'):
+            self.request.upload_errors = {}
+        self.request.upload_errors[self.field_name] = message
+        self.header = None
+        self.upload_interrupted()
+        raise SkipFile(message)
+
+    def file_complete(self, file_size):
+        if not self.active:
+            return None
+        return super().file_complete(file_size)
@@ -16,12 +16,17 @@ urlpatterns = [
          name='edit_post'),
     path('posts/<int:post_id>/delete/', views.PostDeleteView.as_view(),
          name='delete_post'),
+    path('posts/image-upload-url/', views.ImageUploadUrlView.as_view(),
+         name='image_upload_url'),
+    path('media-upload/<str:token>/', views.ObjectUploadView.as_view(),
+         name='object_upload'),
     path('posts/<int:post_id>/comment/', views.AddCommentView.as_view(),
          name='add_comment'),
     path('posts/<int:post_id>/edit_comment/<int:comment_id>/',
          views.EditCommentView.as_view(), name='edit_comment'),
     path('posts/<int:post_id>/delete_comment/<int:comment_id>/',
          views.DeleteCommentView.as_view(), name='delete_comment'),
+    path('search/', views.SearchView.as_view(), name='search'),
     path('profile/<str:username>/', views.ProfileView.as_view(),
          name='profile'),
     path('profile/edit', views.EditProfileView.as_view(),
@@ -1,16 +1,48 @@
 # blog/views.py
+import mimetypes
+import posixpath
+import re
+from pathlib import Path
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.db.models import Count
+from django.core import signing
+from django.db.models import Count, Q
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseRedirect, JsonResponse
+)
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.decorators import method_decorator
+from django.utils.http import urlencode
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 from django.views.generic import CreateView, UpdateView, DeleteView
 from django.views.generic import DetailView, ListView
 
-from .constants import POSTS_ON_PAGE
+from .archive import (
+    PostsWithArchive, archived_comments, archived_post_or_404,
+    visible_archived_posts
+)
+from .constants import (
+    IMAGE_KEY_SALT, POSTS_ON_PAGE, STATIC_IMMUTABLE_MAX_AGE, STATIC_MAX_AGE
+)
+from .deletion import mark_post_deleted
 from .forms import CommentForm, PostForm, ProfileForm
-from .mixins import OnlyAuthorMixin, CommentMixin, PostMixin
-from .models import Category, Comment, Post, User
+from .images import image_limits_error
+from .mixins import (
+    OnlyAuthorMixin, CommentMixin, ImageUploadMixin, PageCacheMixin,
+    PostMixin, ReplicaReadMixin, StreamingRenderMixin, TemplateEngineMixin
+)
+from .models import ArchivedPost, Category, Comment, Post, User
+from .search import search_posts
+from .storage import LimitedReader, LocalObjectClient, UploadTooLarge
+from .utils import accepted_encodings
+
+HASHED_STATIC_NAME = re.compile(r'\.[0-9a-f]{12}\.[^/]+$')
+STATIC_ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
 
 
 def process_posts(posts=Post.objects.all(), apply_filters=True,
@@ -18,29 +50,36 @@ def process_posts(posts=Post.objects.all(), apply_filters=True,
                   apply_annotation=True):
     """Фильтрация, аннотирование и сортировка постов."""
     if apply_filters:
+        # is_visible учитывает и публикацию категории, без JOIN.
         posts = posts.filter(
-            is_published=True,
-            category__is_published=True,
+            is_visible=True,
             pub_date__lte=timezone.now()
         )
     if use_select_related:
-        posts = posts.select_related('category', 'location', 'author')
+        posts = posts.select_related('category', 'visible_location', 'author')
     if apply_annotation:
-        posts = posts.annotate(
-            comment_count=Count('comments')).order_by(*Post._meta.ordering)
+        # Комментарии пользователей, удаление которых запланировано,
+        # скрыты и на странице публикации.
+        posts = posts.annotate(comment_count=Count(
+            'comments', filter=Q(comments__author__deletion__isnull=True),
+        )).order_by(*Post._meta.ordering)
     return posts
 
 
-class IndexListView(ListView):
+class IndexListView(ReplicaReadMixin, PageCacheMixin,
+                    StreamingRenderMixin, TemplateEngineMixin, ListView):
     """Главная страница."""
 
     model = Post
     paginate_by = POSTS_ON_PAGE
     template_name = 'blog/index.html'
-    queryset = process_posts()
+
+    def get_queryset(self):
+        return process_posts()
 
 
-class CategoryPostsView(ListView):
+class CategoryPostsView(ReplicaReadMixin, PageCacheMixin,
+                        StreamingRenderMixin, TemplateEngineMixin, ListView):
     """Отображение публикаций в категории."""
 
     model = Post
@@ -56,7 +95,8 @@ class CategoryPostsView(ListView):
         return process_posts(self.get_category().posts.all())
 
 
-class PostCreateView(LoginRequiredMixin, PostMixin, CreateView):
+class PostCreateView(LoginRequiredMixin, ImageUploadMixin, PostMixin,
+                     CreateView):
 
     form_class = PostForm
 
@@ -68,7 +108,8 @@ class PostCreateView(LoginRequiredMixin, PostMixin, CreateView):
         return reverse('blog:profile', args=[self.request.user.username])
 
 
-class PostUpdateView(OnlyAuthorMixin, PostMixin, UpdateView):
+class PostUpdateView(OnlyAuthorMixin, ImageUploadMixin, PostMixin,
+                     UpdateView):
     """Редактирование публикации."""
 
     form_class = PostForm
@@ -79,7 +120,15 @@ class PostUpdateView(OnlyAuthorMixin, PostMixin, UpdateView):
 
 
 class PostDeleteView(OnlyAuthorMixin, PostMixin, DeleteView):
-    """Удаление публикации."""
+    """Удаление публикации.
+
+    Публикация только отмечается удалённой и сразу пропадает со
+    страниц; строки удаляет purge_deleted.
+    """
+
+    def form_valid(self, form):
+        mark_post_deleted(self.object)
+        return HttpResponseRedirect(self.get_success_url())
 
     def get_context_data(self, **kwargs):
         return super().get_context_data(**kwargs,
@@ -89,15 +138,32 @@ class PostDeleteView(OnlyAuthorMixin, PostMixin, DeleteView):
         return reverse('blog:profile', args=[self.request.user.username])
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ReplicaReadMixin, PageCacheMixin,
+                     StreamingRenderMixin, TemplateEngineMixin, DetailView):
     """Детальная страница публикации."""
 
     model = Post
     template_name = 'blog/detail.html'
     pk_url_kwarg = 'post_id'
 
+    def bypass_page_cache(self):
+        user = self.request.user
+        pk = self.kwargs[self.pk_url_kwarg]
+        return user.is_authenticated and (
+            Post.objects.filter(
+                Q(author=user) | Q(comments__author=user), pk=pk,
+            ).exists()
+            or ArchivedPost.objects.filter(
+                Q(author_id=user.pk) | Q(comments__author_id=user.pk), pk=pk,
+            ).exists()
+        )
+
     def get_object(self):
-        post = super().get_object()
+        try:
+            post = super().get_object()
+        except Http404:
+            return archived_post_or_404(
+                self.kwargs[self.pk_url_kwarg], self.request.user)
         if self.request.user == post.author:
             return post
         return super().get_object(process_posts(
@@ -106,28 +172,42 @@ class PostDetailView(DetailView):
         ))
 
     def get_context_data(self, **kwargs):
+        if getattr(self.object, 'archived', False):
+            comments = archived_comments(self.object)
+        else:
+            comments = self.object.comments.select_related('author').filter(
+                author__deletion__isnull=True)
         return super().get_context_data(
             **kwargs,
             form=CommentForm(),
-            comments=self.object.comments.select_related('author'),
+            comments=comments,
         )
 
 
-class ProfileView(ListView):
+class ProfileView(ReplicaReadMixin, PageCacheMixin,
+                  StreamingRenderMixin, TemplateEngineMixin, ListView):
     """Просмотр профиля."""
 
     model = Post
     template_name = 'blog/profile.html'
     paginate_by = POSTS_ON_PAGE
 
+    def bypass_page_cache(self):
+        return self.request.user.get_username() == self.kwargs['username']
+
     def get_author(self):
-        return get_object_or_404(User, username=self.kwargs['username'])
+        return get_object_or_404(
+            User, username=self.kwargs['username'], deletion__isnull=True)
 
     def get_queryset(self):
         author = self.get_author()
-        return process_posts(
-            author.posts.all(),
-            apply_filters=self.request.user != author)
+        apply_filters = self.request.user != author
+        return PostsWithArchive(
+            process_posts(author.posts.all(), apply_filters=apply_filters),
+            visible_archived_posts(
+                ArchivedPost.objects.filter(author_id=author.pk),
+                apply_filters=apply_filters),
+        )
 
     def get_context_data(self, **kwargs):
         return super().get_context_data(
@@ -136,6 +216,28 @@ class ProfileView(ListView):
         )
 
 
+class SearchView(ReplicaReadMixin, ListView):
+    """Поиск публикаций по заголовку и тексту."""
+
+    model = Post
+    paginate_by = POSTS_ON_PAGE
+    template_name = 'blog/search.html'
+
+    def get_search_query(self):
+        return self.request.GET.get('q', '').strip()
+
+    def get_queryset(self):
+        return search_posts(process_posts(), self.get_search_query())
+
+    def get_context_data(self, **kwargs):
+        query = self.get_search_query()
+        return super().get_context_data(
+            **kwargs,
+            query=query,
+            page_query=urlencode({'q': query}) + '&',
+        )
+
+
 class EditProfileView(LoginRequiredMixin, UpdateView):
     """Редактирование профиля."""
 
@@ -173,3 +275,110 @@ class EditCommentView(OnlyAuthorMixin, CommentMixin, UpdateView):
 
 class DeleteCommentView(OnlyAuthorMixin, CommentMixin, DeleteView):
     pass
+
+
+class ImageUploadUrlView(LoginRequiredMixin, View):
+    """Ссылка для загрузки изображения напрямую в хранилище.
+
+    Принимает filename, content_type и size. В ответе — url, method
+    и headers для загрузки файла и image_key, который затем передаётся
+    в форму публикации вместо самого файла.
+    """
+
+    http_method_names = ['post']
+
+    def post(self, request):
+        field = Post._meta.get_field('image')
+        if not hasattr(field.storage, 'presigned_upload'):
+            raise Http404
+        filename = request.POST.get('filename', '')
+        content_type = request.POST.get('content_type', '')
+        try:
+            size = int(request.POST.get('size', ''))
+        except ValueError:
+            size = None
+        if not filename or size is None or not content_type.startswith(
+                'image/'):
+            return JsonResponse(
+                {'error': 'Укажите имя, тип и размер изображения.'},
+                status=400)
+        error = image_limits_error(size=size)
+        if error:
+            return JsonResponse({'error': error}, status=400)
+        name = field.storage.get_available_name(
+            field.generate_filename(Post(author=request.user), filename))
+        return JsonResponse({
+            **field.storage.presigned_upload(name, content_type),
+            'image_key': signing.dumps(name, salt=IMAGE_KEY_SALT),
+        })
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ObjectUploadView(View):
+    """Приём загрузки по подписанной ссылке локального хранилища.
+
+    С S3ObjectClient ссылки ведут прямо в хранилище, и файлы
+    через это представление не проходят.
+    """
+
+    http_method_names = ['put']
+
+    def put(self, request, token):
+        storage = Post._meta.get_field('image').storage
+        key = LocalObjectClient.load_presigned_key(token)
+        if key is None or not isinstance(
+                getattr(storage, 'client', None), LocalObjectClient):
+            raise Http404
+        if int(request.META.get('CONTENT_LENGTH') or 0) > (
+                settings.POST_IMAGE_MAX_BYTES):
+            return HttpResponse(status=413)
+        # Ссылка одноразовая: иначе объект можно подменить уже после
+        # проверки в PostForm.clean_image_key().
+        if storage.client.head_object(key) is not None:
+            return HttpResponse(status=409)
+        try:
+            storage.client.put_object(key, LimitedReader(
+                request, settings.POST_IMAGE_MAX_BYTES))
+        except UploadTooLarge:
+            return HttpResponse(status=413)
+        storage.forget(key)
+        return HttpResponse(status=200)
+
+
+class StaticFileView(View):
+    """Раздача собранной статики из STATIC_ROOT.
+
+    Если клиент принимает br или gzip и collectstatic сохранил сжатую
+    копию, отдаётся она. Файлы с хешем в имени кешируются навсегда.
+    """
+
+    http_method_names = ['get', 'head']
+
+    def get(self, request, path):
+        root = Path(settings.STATIC_ROOT).resolve()
+        name = posixpath.normpath(path).lstrip('/')
+        file_path = (root / name).resolve()
+        if not file_path.is_relative_to(root) or not file_path.is_file():
+            raise Http404
+        content_type = (mimetypes.guess_type(file_path.name)[0]
+                        or 'application/octet-stream')
+        accepted = accepted_encodings(
+            request.headers.get('Accept-Encoding', ''))
+        encoding = None
+        for candidate, suffix in STATIC_ENCODINGS:
+            compressed = file_path.with_name(file_path.name + suffix)
+            if candidate in accepted and compressed.is_file():
+                file_path, encoding = compressed, candidate
+                break
+        response = FileResponse(
+            open(file_path, 'rb'), content_type=content_type)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        patch_vary_headers(response, ['Accept-Encoding'])
+        if HASHED_STATIC_NAME.search(name):
+            response.headers['Cache-Control'] = (
+                f'public, max-age={STATIC_IMMUTABLE_MAX_AGE}, immutable')
+        else:
+            response.headers['Cache-Control'] = (
+                f'public, max-age={STATIC_MAX_AGE}')
+        return response
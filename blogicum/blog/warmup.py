@@ -0,0 +1,30 @@
+# blog/warmup.py
+import logging
+from pathlib import Path
+
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def iter_template_names(directory):
+    for path in sorted(Path(directory).rglob('*.html')):
+        yield path.relative_to(directory).as_posix()
+
+
+def warm_templates():
+    """Компиляция шаблонов из DIRS в кеш загрузчика.
+
+    Возвращает число скомпилированных шаблонов.
+    """
+    compiled = 0
+    for engine in engines.all():
+        for directory in engine.dirs:
+            for name in iter_template_names(directory):
+                try:
+                    engine.get_template(name)
+                except TemplateSyntaxError:
+                    logger.exception('Не удалось скомпилировать %s', name)
+                else:
+                    compiled += 1
+    return compiled
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
+from importlib.util import find_spec
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +25,7 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-1^#u4weyr+(k#3=$opse7r+ou0vv!%_te(oe)qn%=x9xsd^5s='
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.getenv('DJANGO_DEBUG', 'True') == 'True'
 
 ALLOWED_HOSTS = ['*']
 
@@ -45,9 +47,12 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'blog.middleware.CompressionMiddleware',
+    'blog.middleware.QueryBudgetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
+    'blog.middleware.ReplicaPinMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
@@ -62,6 +67,48 @@ EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
 
 # Настройки для работы с изображениями
 MEDIA_ROOT = BASE_DIR / 'media'
+# Удалять файлы изображений удалённых и изменённых публикаций сразу
+# после фиксации транзакции. Без этого оставшиеся файлы собирает
+# команда gc_media.
+MEDIA_CLEANUP_ON_COMMIT = False
+
+# Хранилище изображений публикаций. LocalObjectClient повторяет
+# поведение объектного хранилища поверх MEDIA_ROOT; для S3-совместимого
+# сервиса укажите 'blog.storage.S3ObjectClient' и параметры bucket,
+# endpoint_url, access_key, secret_key в client_options.
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    'post_images': {
+        'BACKEND': 'blog.storage.ObjectStorage',
+        'OPTIONS': {
+            'client': 'blog.storage.LocalObjectClient',
+            'metadata_cache_timeout': 300,
+        },
+    },
+}
+
+# Изображения публикаций загружаются потоково во временный файл;
+# загрузка прерывается при превышении лимитов.
+FILE_UPLOAD_HANDLERS = [
+    'blog.uploadhandlers.PostImageUploadHandler',
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'django.core.files.uploadhandler.TemporaryFileUploadHandler',
+]
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_PIXELS = 40_000_000
+# Сохранять рядом с изображением его WebP-копию.
+POST_IMAGE_WEBP = True
+# Раскладка изображений по вложенным каталогам: 'hash' — по случайному
+# префиксу (глубина POST_IMAGE_SHARD_DEPTH), 'date' — по дате создания
+# публикации, None — все файлы в одном каталоге. Существующие файлы
+# переносит команда shard_media.
+POST_IMAGE_SHARDING = 'hash'
+POST_IMAGE_SHARD_DEPTH = 2
 
 # Дополнительные директории, где собраны статические файлы проекта.
 STATIC_URL = '/static/'
@@ -69,6 +116,12 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [
     BASE_DIR / 'static',
 ]
+# Куда collectstatic собирает статику. В production имена файлов
+# содержат хеш содержимого, а рядом лежат сжатые копии .gz и .br.
+STATIC_ROOT = BASE_DIR / 'static_collected'
+if not DEBUG:
+    STORAGES['staticfiles']['BACKEND'] = (
+        'blog.storage.CompressedManifestStaticFilesStorage')
 
 LOGIN_REDIRECT_URL = '/'
 
@@ -76,6 +129,21 @@ LOGIN_URL = 'login'
 
 LOGIN_REDIRECT_URL = 'blog:index'
 
+
+def user_profile_url(user):
+    """Адрес профиля для User.get_absolute_url.
+
+    blog.utils импортируется при вызове: модуль настроек загружается
+    раньше, чем приложения.
+    """
+    from blog.utils import fast_reverse
+    return fast_reverse('blog:profile', user.username)
+
+
+ABSOLUTE_URL_OVERRIDES = {
+    'auth.user': user_profile_url,
+}
+
 TEMPLATES_DIR = BASE_DIR / 'templates'
 
 TEMPLATES = [
@@ -94,6 +162,72 @@ TEMPLATES = [
     },
 ]
 
+# В production шаблоны загружаются кешируемым загрузчиком и
+# компилируются заранее при старте (BlogConfig.ready).
+if not DEBUG:
+    TEMPLATES[0]['APP_DIRS'] = False
+    TEMPLATES[0]['OPTIONS']['loaders'] = [
+        ('django.template.loaders.cached.Loader', [
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ]),
+    ]
+TEMPLATE_WARMUP = not DEBUG
+
+# Необязательный движок Jinja2 (нужен пакет jinja2). Его шаблоны лежат
+# в JINJA2_TEMPLATES_DIR и повторяют шаблоны ленты, категории, профиля
+# и публикации. Движок для страницы выбирается в BLOG_TEMPLATE_ENGINES
+# по имени URL, например {'blog:index': 'jinja2'}.
+JINJA2_TEMPLATES_DIR = BASE_DIR / 'jinja2'
+if find_spec('jinja2'):
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [JINJA2_TEMPLATES_DIR],
+        'APP_DIRS': False,
+        'OPTIONS': {
+            'environment': 'blog.jinja2.environment',
+            'extensions': ['django_bootstrap5.jinja2.BootstrapTags'],
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+            ],
+        },
+    })
+BLOG_TEMPLATE_ENGINES = {}
+
+# Время жизни кеша страниц ленты, категорий, профилей и публикаций,
+# в секундах; 0 — без кеша. Шапка и форма комментария дорисовываются
+# для каждого пользователя отдельно.
+BLOG_PAGE_CACHE_TIMEOUT = 0 if DEBUG else 60
+
+# Сжатие ответов (blog.middleware.CompressionMiddleware): ответы меньше
+# BLOG_COMPRESSION_MIN_SIZE байт отдаются как есть; сжатые варианты
+# страниц из кеша страниц до BLOG_COMPRESSION_CACHE_MAX_SIZE байт
+# тоже кешируются. Brotli используется, если установлен пакет brotli.
+BLOG_COMPRESSION_MIN_SIZE = 512
+BLOG_COMPRESSION_CACHE_MAX_SIZE = 1024 * 1024
+BLOG_GZIP_LEVEL = 6
+BLOG_BROTLI_QUALITY = 5
+
+# Отдавать ленту, категории, профили и публикации потоком: начало
+# страницы уходит до выборки публикаций и комментариев.
+BLOG_STREAMING_RENDER = False
+
+# Бюджет запросов к базе (blog.middleware.QueryBudgetMiddleware): число
+# запросов и их суммарное время в миллисекундах для страниц по имени URL
+# или пространству имён, для остальных — BLOG_QUERY_BUDGET. Превышение пишется в журнал со
+# стеком вызовов, а в строгом режиме (в тестах он включён всегда)
+# превышение числа запросов вызывает ошибку; превышение времени только
+# пишется в журнал.
+BLOG_QUERY_BUDGET = (10, 200)
+BLOG_QUERY_BUDGETS = {
+    'blog:post_detail': (12, 200),
+    'blog:profile': (12, 200),
+    'admin': (30, 500),
+}
+BLOG_QUERY_BUDGET_STRICT = os.getenv(
+    'BLOG_QUERY_BUDGET_STRICT', 'False') == 'True'
+
 WSGI_APPLICATION = 'blogicum.wsgi.application'
 
 
@@ -104,9 +238,61 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение переиспользуется между запросами и проверяется
+        # перед повторным использованием.
+        'CONN_MAX_AGE': int(os.getenv('DJANGO_CONN_MAX_AGE', '60')),
+        'CONN_HEALTH_CHECKS': os.getenv(
+            'DJANGO_CONN_HEALTH_CHECKS', 'True') == 'True',
+        'OPTIONS': {
+            # Транзакции сразу берут блокировку на запись и ждут её
+            # busy_timeout, а не падают с «database is locked».
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Архив старых публикаций (archive_posts): отдельная база SQLite
+# из DJANGO_DB_ARCHIVE или таблицы в основной базе.
+if os.getenv('DJANGO_DB_ARCHIVE'):
+    DATABASES['archive'] = {
+        **DATABASES['default'],
+        'NAME': os.getenv('DJANGO_DB_ARCHIVE'),
+    }
+BLOG_ARCHIVE_DATABASE = 'archive' if 'archive' in DATABASES else 'default'
+# Публикации старше стольких дней archive_posts переносит в архив.
+BLOG_ARCHIVE_AFTER_DAYS = 365
+
+# Реплики для чтения страниц блога: пути к файлам SQLite через запятую
+# в DJANGO_DB_REPLICAS. Для локальной проверки подойдёт второй файл или
+# file:replica?mode=memory&cache=shared; обновляет их refresh_replica.
+# В тестах реплики зеркалируют default.
+BLOG_READ_REPLICAS = []
+for number, replica in enumerate(
+        filter(None, os.getenv('DJANGO_DB_REPLICAS', '').split(',')), 1):
+    DATABASES[f'replica{number}'] = {
+        **DATABASES['default'],
+        'NAME': replica,
+        'TEST': {'MIRROR': 'default'},
+    }
+    BLOG_READ_REPLICAS.append(f'replica{number}')
+DATABASE_ROUTERS = [
+    'blog.routers.ArchiveRouter', 'blog.routers.ReplicaRouter',
+]
+# Сколько секунд после записи читать данные пользователя из default.
+BLOG_REPLICA_PIN_SECONDS = 5
+
+# PRAGMA, которые blog.signals применяет к каждому новому соединению
+# с SQLite. WAL позволяет читать во время записи комментариев.
+SQLITE_PRAGMAS = {
+    'journal_mode': os.getenv('SQLITE_JOURNAL_MODE', 'wal'),
+    'synchronous': os.getenv('SQLITE_SYNCHRONOUS', 'normal'),
+    'mmap_size': int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    # Отрицательное значение — размер в КиБ.
+    'cache_size': int(os.getenv('SQLITE_CACHE_SIZE', -64 * 1024)),
+    'busy_timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 5000)),
+    'temp_store': 'memory',
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -41,6 +41,19 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def temporary_media_root(settings, tmp_path):
+    """Изображения и их производные не остаются в blogicum/media."""
+    settings.MEDIA_ROOT = tmp_path / "media"
+    return settings.MEDIA_ROOT
+
+
+@pytest.fixture(autouse=True)
+def enable_strict_query_budget():
+    with override_settings(BLOG_QUERY_BUDGET_STRICT=True):
+        yield
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -92,6 +105,7 @@ pytest_plugins = [
     "fixtures.locations",
     "fixtures.categories",
     "fixtures.comments",
+    "fixtures.queries",
     "adapters.comment",
 ]
 
@@ -359,11 +373,11 @@ def cleanup(request):
 
     for root, dirs, files in os.walk(image_dir):
         for filename in files:
-            if (
-                    filename.endswith(".jpg")
-                    or filename.endswith(".gif")
-                    or filename.endswith(".png")
-            ):
+            if filename.endswith((".jpg", ".gif", ".png", ".webp")):
                 file_path = os.path.join(root, filename)
                 if os.path.getmtime(file_path) >= start_time:
                     os.remove(file_path)
+    # Пустые каталоги шардов posts_images/xx/yy/.
+    for root, dirs, files in os.walk(image_dir, topdown=False):
+        if root != str(image_dir) and not os.listdir(root):
+            os.rmdir(root)
@@ -0,0 +1,131 @@
+"""Поиск N+1 в запросах, которые выполняет тестовый клиент.
+
+Каждый запрос django.test.Client записывает запросы к базе и
+группирует их по SQL без значений и по стеку вызовов в коде проекта.
+Если запрос одной формы из одного места повторяется больше
+REPEAT_LIMIT раз, тест падает с отчётом: обычно это ленивая загрузка
+вроде post.author или comment.author в цикле шаблона.
+"""
+import os
+import re
+import sys
+from collections import defaultdict
+
+import pytest
+from django.conf import settings
+from django.db import connections
+from django.test.client import Client
+
+REPEAT_LIMIT = 3
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+\b")
+IN_LIST = re.compile(r"\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)")
+
+
+def normalize_sql(sql: str) -> str:
+    sql = STRING_LITERAL.sub("?", sql)
+    sql = NUMBER_LITERAL.sub("?", sql)
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def template_frame(frame):
+    """Шаблон и строка тега, который выводит узел Django-шаблона."""
+    node = frame.f_locals.get("self")
+    origin = getattr(node, "origin", None)
+    token = getattr(node, "token", None)
+    if origin is None or token is None:
+        return None
+    return origin.name, token.lineno, token.contents.split()[0]
+
+
+def project_stack():
+    """Кадры кода проекта и шаблонов, от внешнего к внутреннему."""
+    root = str(settings.BASE_DIR)
+    stack = []
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(root):
+            stack.append((filename, frame.f_lineno, frame.f_code.co_name))
+        elif frame.f_code.co_name == "render_annotated":
+            stack.append(template_frame(frame))
+        frame = frame.f_back
+    return tuple(reversed([item for item in stack if item]))
+
+
+class RequestQueries:
+    """Запросы к базе, сгруппированные по форме SQL и стеку вызовов."""
+
+    def __init__(self, limit: int = REPEAT_LIMIT):
+        self.limit = limit
+        self.groups = defaultdict(list)
+        self.connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        self.groups[(normalize_sql(sql), project_stack())].append(sql)
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.connections = connections.all()
+        for connection in self.connections:
+            connection.execute_wrappers.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        for connection in self.connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+
+    def report(self, title: str):
+        repeated = [
+            (key, queries) for key, queries in self.groups.items()
+            if len(queries) > self.limit
+        ]
+        if not repeated:
+            return None
+        lines = [
+            f"Убедитесь, что при запросе {title} нет повторяющихся запросов "
+            "к базе (N+1): используйте select_related() или "
+            "prefetch_related()."
+        ]
+        for (sql, stack), queries in repeated:
+            lines.append(f"{len(queries)} раз: {sql}")
+            lines.extend(
+                f"  {os.path.relpath(filename, settings.BASE_DIR)}:{lineno}"
+                f" в {name}"
+                for filename, lineno, name in stack
+            )
+        return "\n".join(lines)
+
+
+def check_queries(recorder: RequestQueries, title: str):
+    report = recorder.report(title)
+    if report is not None:
+        pytest.fail(report, pytrace=False)
+
+
+def recording_stream(chunks, recorder, title):
+    with recorder:
+        yield from chunks
+    check_queries(recorder, title)
+
+
+@pytest.fixture(autouse=True)
+def detect_n_plus_one(monkeypatch):
+    request = Client.request
+
+    def recording_request(self, **request_kwargs):
+        recorder = RequestQueries()
+        title = (f"{request_kwargs.get('REQUEST_METHOD', 'GET')} "
+                 f"{request_kwargs.get('PATH_INFO', '')}")
+        with recorder:
+            response = request(self, **request_kwargs)
+        if getattr(response, "streaming", False):
+            response.streaming_content = recording_stream(
+                response.streaming_content, recorder, title)
+        else:
+            check_queries(recorder, title)
+        return response
+
+    monkeypatch.setattr(Client, "request", recording_request)
@@ -0,0 +1,89 @@
+import io
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blog.models import ArchivedPost, Comment, Post
+from blog.pagecache import page_generation
+
+pytestmark = [pytest.mark.django_db]
+
+
+def call(command, *args, **kwargs):
+    call_command(command, *args, stdout=io.StringIO(), **kwargs)
+
+
+@pytest.fixture
+def old_post(post_with_published_location, comment_to_a_post):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(
+        pub_date=timezone.now() - timedelta(days=400))
+    return post
+
+
+def test_archived_post_still_resolves(
+        old_post, comment_to_a_post, client, user_client):
+    image = old_post.image.name
+    storage = old_post.image.storage
+    call('archive_posts', older_than=365)
+    assert not Post.objects.filter(pk=old_post.pk).exists()
+    assert ArchivedPost.objects.get(pk=old_post.pk).comments.count() == 1
+    assert storage.exists(image), (
+        'Убедитесь, что при переносе в архив изображение не удаляется.'
+    )
+    response = client.get(f'/posts/{old_post.pk}/')
+    assert response.status_code == 200, (
+        'Убедитесь, что архивная публикация открывается по прежнему адресу.'
+    )
+    assert old_post.title in response.content.decode()
+    assert list(response.context['comments'])[0].text == (
+        comment_to_a_post.text)
+    response = user_client.get(f'/profile/{old_post.author.username}/')
+    assert [post.pk for post in response.context['page_obj']] == [
+        old_post.pk], (
+        'Убедитесь, что архивные публикации видны в профиле автора.'
+    )
+
+
+def test_archiving_deletes_rows_without_collector(
+        old_post, django_capture_on_commit_callbacks):
+    generation = page_generation()
+    with CaptureQueriesContext(connection) as queries, \
+            django_capture_on_commit_callbacks(execute=True) as callbacks:
+        call('archive_posts', older_than=365)
+    deletes = [query['sql'] for query in queries.captured_queries
+               if query['sql'].startswith('DELETE')]
+    assert len(deletes) == 2 and not any(
+        query['sql'].startswith('UPDATE "blog_post"')
+        for query in queries.captured_queries), (
+        'Убедитесь, что перенесённые строки удаляются без Collector.'
+    )
+    assert len(callbacks) == 1 and page_generation() == generation + 1, (
+        'Убедитесь, что после переноса кеш страниц сбрасывается один раз.'
+    )
+    assert not Comment.objects.filter(post_id=old_post.pk).exists()
+
+
+def test_archived_unpublished_post_hidden(old_post, client, user_client):
+    Post.objects.filter(pk=old_post.pk).update(is_published=False)
+    call('archive_posts', older_than=365)
+    assert client.get(f'/posts/{old_post.pk}/').status_code == 404
+    assert user_client.get(f'/posts/{old_post.pk}/').status_code == 200
+
+
+def test_unarchive_restores_post_and_comments(old_post, comment_to_a_post):
+    created_at = comment_to_a_post.created_at
+    call('archive_posts', older_than=365)
+    call('unarchive_posts', old_post.pk)
+    assert not ArchivedPost.objects.exists()
+    restored = Comment.objects.get(pk=comment_to_a_post.pk)
+    assert restored.post_id == old_post.pk
+    assert restored.created_at == created_at, (
+        'Убедитесь, что при возврате из архива сохраняется время '
+        'создания комментария.'
+    )
+    assert Post.objects.get(pk=old_post.pk).image.name == old_post.image.name
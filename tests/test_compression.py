@@ -0,0 +1,78 @@
+import gzip
+import zlib
+
+import pytest
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory
+
+from blog import middleware
+
+
+def run_middleware(response, accept_encoding='gzip'):
+    request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=accept_encoding)
+    return middleware.CompressionMiddleware(lambda request: response)(request)
+
+
+def test_large_html_compressed():
+    content = '<p>Текст публикации</p>' * 100
+    response = run_middleware(HttpResponse(content))
+    assert response['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response['Vary']
+    assert gzip.decompress(response.content).decode() == content
+
+
+@pytest.mark.parametrize('response, accept_encoding', [
+    (HttpResponse('<p>мало</p>'), 'gzip'),
+    (HttpResponse(b'\x89PNG' * 500, content_type='image/png'), 'gzip'),
+    (HttpResponse('<p>текст</p>' * 200), 'identity'),
+])
+def test_response_left_uncompressed(response, accept_encoding):
+    response = run_middleware(response, accept_encoding)
+    assert not response.has_header('Content-Encoding'), (
+        'Убедитесь, что маленькие ответы, изображения и ответы клиентам '
+        'без поддержки gzip не сжимаются.'
+    )
+
+
+def test_streaming_response_compressed_chunk_by_chunk():
+    produced = []
+
+    def chunks():
+        for number in range(3):
+            produced.append(number)
+            yield f'<article>{number}</article>' * 50
+
+    response = run_middleware(StreamingHttpResponse(chunks()))
+    stream = iter(response.streaming_content)
+    decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+    first = decompressor.decompress(next(stream)).decode()
+    assert produced == [0] and first.startswith('<article>0</article>'), (
+        'Убедитесь, что потоковые ответы сжимаются без буферизации.'
+    )
+    rest = b''.join(stream)
+    assert decompressor.decompress(rest).decode().endswith(
+        '<article>2</article>')
+
+
+@pytest.mark.django_db
+def test_cached_page_compressed_once(
+        settings, monkeypatch, client, post_with_published_location):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 60
+    cache.clear()
+    calls = []
+    compress = middleware.compress
+
+    def spy(*args):
+        calls.append(args)
+        return compress(*args)
+
+    monkeypatch.setattr(middleware, 'compress', spy)
+    first = client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+    second = client.get('/', HTTP_ACCEPT_ENCODING='gzip')
+    cache.clear()
+    assert second['Content-Encoding'] == 'gzip'
+    assert first.content == second.content
+    assert len(calls) == 1, (
+        'Убедитесь, что сжатый вариант страницы из кеша сохраняется в кеше.'
+    )
@@ -0,0 +1,16 @@
+import pytest
+from django.db import connection
+
+
+@pytest.mark.django_db
+def test_sqlite_pragmas_applied():
+    with connection.cursor() as cursor:
+        values = {}
+        for name in ('synchronous', 'busy_timeout', 'temp_store'):
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    assert values == {'synchronous': 1, 'busy_timeout': 5000,
+                      'temp_store': 2}, (
+        'Убедитесь, что при подключении к SQLite применяются '
+        'настройки из SQLITE_PRAGMAS.'
+    )
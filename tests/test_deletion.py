@@ -0,0 +1,119 @@
+import io
+import math
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext
+
+from blog.deletion import mark_posts_deleted, schedule_user_deletion
+from blog.archive import visible_archived_posts
+from blog.models import Comment, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_user_deletion_hidden_at_once_and_purged_in_batches(client):
+    call_command(
+        'generate_blog_data', users=4, categories=3, locations=2, posts=60,
+        comments=600, unpublished_share=0, scheduled_share=0,
+        stdout=io.StringIO())
+    user = User.objects.annotate(count=Count('posts')).latest('count')
+    posts = list(Post.objects.filter(author=user).values_list('pk', flat=True))
+    schedule_user_deletion(user)
+    assert not Post.objects.filter(author=user).exists()
+    assert client.get(f'/profile/{user.username}/').status_code == 404
+    assert client.get(f'/posts/{posts[0]}/').status_code == 404
+    response = client.get(f'/posts/{Post.objects.first().pk}/')
+    assert all(comment.author != user
+               for comment in response.context['comments']), (
+        'Убедитесь, что комментарии удаляемого пользователя скрыты сразу.'
+    )
+    with CaptureQueriesContext(connection) as queries:
+        call_command('purge_deleted', batch_size=50, stdout=io.StringIO())
+    assert not any('"blog_comment"."text"' in query['sql']
+                   and '"blog_comment"."post_id" IN' in query['sql']
+                   for query in queries.captured_queries), (
+        'Убедитесь, что purge_deleted не загружает удаляемые комментарии.'
+    )
+    assert not User.objects.filter(pk=user.pk).exists()
+    assert not Post.all_objects.filter(pk__in=posts).exists()
+    assert not Comment.objects.filter(post_id__in=posts).exists()
+    assert not Comment.objects.filter(author_id=user.pk).exists()
+    assert Post.objects.count() == 60 - len(posts)
+
+
+@pytest.mark.slow
+def test_purge_deleted_at_scale_stays_in_batches():
+    call_command(
+        'generate_blog_data', users=20, categories=5, locations=5,
+        posts=2000, comments=8000, unpublished_share=0, scheduled_share=0,
+        stdout=io.StringIO())
+    mark_posts_deleted(Post.objects.filter(pk__lte=1500))
+    posts = Post.all_objects.filter(deleted_at__isnull=False).count()
+    comments = Comment.objects.filter(post__deleted_at__isnull=False).count()
+    batch_size = 200
+    deletes = []
+
+    def record_delete(execute, sql, params, many, context):
+        if sql.startswith('DELETE'):
+            deletes.append(len(params or ()))
+        return execute(sql, params, many, context)
+
+    with CaptureQueriesContext(connection) as queries:
+        with connection.execute_wrapper(record_delete):
+            call_command('purge_deleted', batch_size=batch_size,
+                         stdout=io.StringIO())
+    assert not Post.all_objects.filter(deleted_at__isnull=False).exists()
+    assert max(deletes) <= batch_size, (
+        'Убедитесь, что purge_deleted удаляет не больше batch_size строк '
+        'одним запросом.'
+    )
+    batches = (math.ceil(posts / batch_size)
+               + math.ceil(comments / batch_size))
+    assert len(queries) <= 3 * batches + 10, (
+        'Убедитесь, что число запросов purge_deleted зависит от числа '
+        'порций, а не строк.'
+    )
+
+
+def test_post_delete_is_soft(user_client, post_with_published_location):
+    post = post_with_published_location
+    user_client.post(f'/posts/{post.pk}/delete/')
+    assert Post.all_objects.get(pk=post.pk).deleted_at is not None, (
+        'Убедитесь, что публикация сначала только отмечается удалённой.'
+    )
+    call_command('purge_deleted', stdout=io.StringIO())
+    assert not Post.all_objects.filter(pk=post.pk).exists()
+
+
+def test_admin_delete_only_schedules(
+        admin_client, user, post_with_published_location):
+    post = post_with_published_location
+    url = f'/admin/blog/post/{post.pk}/delete/'
+    assert admin_client.get(url).status_code == 200
+    admin_client.post(url, {'post': 'yes'})
+    assert Post.all_objects.get(pk=post.pk).deleted_at is not None
+    action = {'action': 'delete_selected', '_selected_action': [user.pk]}
+    assert admin_client.post('/admin/auth/user/', action).status_code == 200
+    admin_client.post('/admin/auth/user/', {**action, 'post': 'yes'})
+    assert User.objects.get(pk=user.pk).deletion, (
+        'Убедитесь, что удаление пользователя в админке только '
+        'планирует удаление.'
+    )
+
+
+def test_comment_count_skips_deleted_users(
+        mixer, client, user, another_user, post_with_published_location):
+    post = post_with_published_location
+    mixer.blend('blog.Comment', post=post, author=user)
+    mixer.blend('blog.Comment', post=post, author=another_user)
+    schedule_user_deletion(another_user)
+    [card] = client.get('/').context['page_obj']
+    assert card.comment_count == 1, (
+        'Убедитесь, что в ленте не учитываются скрытые комментарии.'
+    )
+    call_command('archive_posts', older_than=-1, stdout=io.StringIO())
+    [archived] = visible_archived_posts()
+    assert archived.comment_count == 1
@@ -0,0 +1,46 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count
+from django.utils import timezone
+
+from blog.models import Category, Comment, Post, User
+
+pytestmark = [pytest.mark.django_db]
+
+
+def generate(seed):
+    call_command(
+        'generate_blog_data', users=5, categories=10, locations=3, posts=40,
+        comments=300, seed=seed, batch_size=7, unpublished_share=0.3,
+        scheduled_share=0.2, stdout=io.StringIO())
+    return (
+        list(Post.objects.order_by('pk').values_list(
+            'title', 'author_id', 'category_id', 'is_published')),
+        list(Comment.objects.order_by('pk').values_list('text', 'post_id')),
+    )
+
+
+def test_generated_data_deterministic_and_realistic(client):
+    first = generate(seed=3)
+    assert (User.objects.count(), Category.objects.count(),
+            Post.objects.count(), Comment.objects.count()) == (5, 10, 40, 300)
+    assert Post.objects.filter(pub_date__gt=timezone.now()).exists()
+    assert Post.objects.filter(is_published=False).exists()
+    assert Category.objects.filter(is_published=False).exists()
+    counts = sorted(Post.objects.annotate(
+        count=Count('comments')).values_list('count', flat=True))
+    assert counts[-1] > 300 / 40 * 3 and counts[0] <= 2, (
+        'Убедитесь, что комментарии распределены между публикациями '
+        'неравномерно, по закону Ципфа.'
+    )
+    assert client.login(username=User.objects.first().username,
+                        password='password')
+    Comment.objects.all().delete()
+    Post.objects.all().delete()
+    Category.objects.all().delete()
+    User.objects.all().delete()
+    assert generate(seed=3) == first, (
+        'Убедитесь, что при одинаковом seed данные одинаковы.'
+    )
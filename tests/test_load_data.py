@@ -0,0 +1,56 @@
+import io
+import json
+from pathlib import Path
+
+import pytest
+from django.core.management import call_command
+
+from blog.models import Category, Comment, Post, User
+from blog.utils import iter_json_array
+
+pytestmark = [pytest.mark.django_db]
+
+DB_JSON = Path(__file__).resolve().parent.parent / 'blogicum' / 'db.json'
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 4096])
+def test_json_array_parsed_incrementally(chunk_size):
+    text = DB_JSON.read_text(encoding='utf-8')
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == (
+        json.loads(text)
+    )
+
+
+def test_load_blog_data(tmp_path, client, django_capture_on_commit_callbacks):
+    records = json.loads(DB_JSON.read_text(encoding='utf-8'))
+    post = next(record for record in records if record['model'] == 'blog.post')
+    records.append({'model': 'blog.comment', 'pk': 7, 'fields': {
+        'text': 'Комментарий', 'author': post['fields']['author'],
+        'post': post['pk'], 'created_at': '2023-01-01T10:00:00Z',
+    }})
+    fixture = tmp_path / 'data.json'
+    # Комментарий в начале файла, раньше публикаций, на которые ссылается.
+    fixture.write_text(json.dumps(records[-1:] + records[:-1]))
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('load_blog_data', fixture, batch_size=5,
+                     stdout=io.StringIO())
+    counts = {model: sum(record['model'] == model for record in records)
+              for model in ('auth.user', 'blog.category', 'blog.post')}
+    assert (User.objects.count(), Category.objects.count(),
+            Post.objects.count()) == tuple(counts.values())
+    comment = Comment.objects.get(pk=7)
+    assert comment.created_at.year == 2023, (
+        'Убедитесь, что load_blog_data сохраняет время создания из фикстуры.'
+    )
+    title = post['fields']['title']
+    response = client.get('/search/', {'q': title})
+    assert title in [found.title for found in response.context['page_obj']]
+    new_post = Post.objects.create(
+        title='Новая публикация', text='Текст', author=comment.author,
+        category=Category.objects.filter(is_published=True).first(),
+        pub_date=comment.created_at)
+    response = client.get('/search/', {'q': 'Новая публикация'})
+    assert list(response.context['page_obj']) == [new_post], (
+        'Убедитесь, что после загрузки поисковый индекс перестроен, '
+        'а его триггеры восстановлены.'
+    )
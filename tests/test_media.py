@@ -0,0 +1,153 @@
+from io import BytesIO, StringIO
+
+import pytest
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_image_file(size=(120, 80), fmt='JPEG', name='temp_image.jpg'):
+    img_io = BytesIO()
+    Image.new('RGB', size, color=(73, 109, 137)).save(img_io, format=fmt)
+    return ImageFile(img_io, name=name)
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def post_with_image(mixer, user, published_category):
+    return mixer.blend(
+        'blog.Post',
+        author=user,
+        category=published_category,
+        image=make_image_file(),
+    )
+
+
+def test_image_meta_saved_on_upload(post_with_image):
+    post_with_image.refresh_from_db()
+    assert post_with_image.image_meta['width'] == 120, (
+        'Убедитесь, что ширина изображения сохраняется при загрузке.'
+    )
+    assert post_with_image.image_meta['height'] == 80
+    assert post_with_image.image_meta['format'] == 'JPEG'
+    assert post_with_image.image_meta['size'] == post_with_image.image.size
+
+
+def test_image_meta_cleared_without_image(post_with_image):
+    post_with_image.image = None
+    post_with_image.save()
+    post_with_image.refresh_from_db()
+    assert post_with_image.image_meta == {}
+
+
+def test_image_dimensions_rendered(client, post_with_image):
+    content = client.get(f'/posts/{post_with_image.id}/').content.decode()
+    assert 'width="120" height="80"' in content, (
+        'Убедитесь, что размеры изображения выводятся в атрибутах `<img>`.'
+    )
+
+
+def test_gc_media_removes_only_orphans(post_with_image, media_root):
+    storage = post_with_image.image.storage
+    orphan = storage.save('posts_images/orphan.jpg', ContentFile(b'x'))
+    out = StringIO()
+    call_command('gc_media', '--dry-run', '--min-age=0', stdout=out)
+    assert orphan in out.getvalue()
+    assert storage.exists(orphan), (
+        'Убедитесь, что в режиме `--dry-run` файлы не удаляются.'
+    )
+    call_command('gc_media', '--min-age=0', stdout=StringIO())
+    assert not storage.exists(orphan)
+    for name in (post_with_image.image.name,
+                 post_with_image.image_meta['webp']):
+        assert storage.exists(name), (
+            'Убедитесь, что gc_media не удаляет изображения публикаций.'
+        )
+
+
+def test_replaced_image_deleted_on_commit(
+        settings, post_with_image, django_capture_on_commit_callbacks):
+    settings.MEDIA_CLEANUP_ON_COMMIT = True
+    storage = post_with_image.image.storage
+    old_name = post_with_image.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_image.image = make_image_file(name='new.jpg')
+        post_with_image.save()
+    assert not storage.exists(old_name)
+    new_name = post_with_image.image.name
+    with django_capture_on_commit_callbacks(execute=True):
+        post_with_image.delete()
+    assert not storage.exists(new_name)
+
+
+def test_webp_derivative_created_and_rendered(client, post_with_image):
+    storage = post_with_image.image.storage
+    webp = post_with_image.image_meta['webp']
+    assert webp and storage.exists(webp), (
+        'Убедитесь, что при загрузке изображения создаётся его WebP-копия.'
+    )
+    content = client.get('/').content.decode()
+    assert f'srcset="{storage.url(webp)}" type="image/webp"' in content
+
+
+def test_build_image_derivatives_backfills_existing(post_with_image):
+    storage = post_with_image.image.storage
+    storage.delete(post_with_image.image_meta['webp'])
+    type(post_with_image).objects.update(image_meta={})
+    out = StringIO()
+    call_command('build_image_derivatives', stdout=out)
+    post_with_image.refresh_from_db()
+    assert post_with_image.image_width == 120
+    assert storage.exists(post_with_image.image_meta['webp'])
+    assert 'Изображений с WebP-копией: 1' in out.getvalue()
+
+
+def test_placeholder_stored_and_rendered_in_feed(client, post_with_image):
+    placeholder = post_with_image.image_placeholder
+    assert placeholder.startswith('data:image/jpeg;base64,'), (
+        'Убедитесь, что при загрузке изображения сохраняется заглушка.'
+    )
+    assert len(placeholder) <= 1024
+    content = client.get('/').content.decode()
+    assert placeholder in content
+    assert 'loading="' in content
+
+
+def test_new_images_stored_in_shards(post_with_image):
+    from blog.images import is_sharded
+    assert is_sharded(post_with_image.image.name), (
+        'Убедитесь, что изображения раскладываются по вложенным каталогам.'
+    )
+
+
+@pytest.mark.parametrize('layout', ['hash', 'date'])
+def test_shard_media_moves_flat_files(
+        settings, mixer, user, published_category, layout,
+        django_capture_on_commit_callbacks):
+    from blog.images import is_sharded
+    settings.POST_IMAGE_SHARDING = None
+    post = mixer.blend(
+        'blog.Post', author=user, category=published_category,
+        image=make_image_file(),
+    )
+    storage = post.image.storage
+    old_files = [post.image.name, post.image_meta['webp']]
+    settings.POST_IMAGE_SHARDING = layout
+    assert not is_sharded(post.image.name)
+    with django_capture_on_commit_callbacks(execute=True):
+        call_command('shard_media', '--batch-size=1', stdout=StringIO())
+    post.refresh_from_db()
+    assert is_sharded(post.image.name)
+    assert post.image_meta['webp'] == f'{post.image.name}.webp'
+    for name in (post.image.name, post.image_meta['webp']):
+        assert storage.exists(name)
+    for name in old_files:
+        assert not storage.exists(name)
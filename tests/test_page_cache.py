@@ -0,0 +1,86 @@
+import pytest
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def page_cache(settings):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 60
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.content.decode(), len(queries)
+
+
+def test_cached_page_keeps_personal_header(
+        user, another_user, another_user_client,
+        post_with_published_location):
+    user_client = Client()
+    user_client.force_login(user)
+    first, first_queries = get(another_user_client, '/')
+    second, second_queries = get(user_client, '/')
+    anonymous, _ = get(Client(), '/')
+    assert post_with_published_location.title in second
+    assert f'/profile/{user.username}/' in second.split('</header>')[0]
+    assert another_user.username not in second.split('</header>')[0], (
+        'Убедитесь, что шапка страницы из кеша дорисовывается '
+        'для текущего пользователя.'
+    )
+    assert 'Войти' in anonymous and '<!--hole' not in anonymous
+    assert second_queries < first_queries, (
+        'Убедитесь, что страница отдаётся из кеша.'
+    )
+
+
+def test_cached_detail_has_own_csrf_form(
+        another_user_client, post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    get(Client(), url)
+    content, _ = get(another_user_client, url)
+    assert 'csrfmiddlewaretoken' in content
+    assert f'/posts/{post_with_published_location.id}/comment/' in content
+    anonymous, _ = get(Client(), url)
+    assert 'csrfmiddlewaretoken' not in anonymous
+
+
+def test_page_refreshed_after_changes(
+        mixer, user_client, post_with_published_location,
+        django_capture_on_commit_callbacks):
+    get(user_client, '/')
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        title='Изменено в обход модели')
+    assert 'Изменено в обход модели' not in get(user_client, '/')[0]
+    post_with_published_location.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        post_with_published_location.save()
+        assert 'Новый заголовок' not in get(user_client, '/')[0], (
+            'Убедитесь, что кеш страниц сбрасывается только после '
+            'фиксации транзакции.'
+        )
+    assert callbacks
+    assert 'Новый заголовок' in get(user_client, '/')[0], (
+        'Убедитесь, что кеш страниц сбрасывается при изменении публикаций.'
+    )
+
+
+def test_author_sees_own_controls(
+        user, user_client, another_user_client,
+        post_with_published_location):
+    url = f'/posts/{post_with_published_location.id}/'
+    get(another_user_client, url)
+    assert 'Отредактировать публикацию' in get(user_client, url)[0]
+    profile_url = f'/profile/{user.username}/'
+    get(another_user_client, profile_url)
+    assert 'Редактировать профиль' in get(user_client, profile_url)[0]
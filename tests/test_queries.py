@@ -0,0 +1,28 @@
+import pytest
+
+from blog import views
+from blog.models import Post
+from fixtures.queries import RequestQueries
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_repeated_lazy_loads_reported(many_posts_with_published_locations):
+    with RequestQueries() as recorder:
+        [post.author for post in Post.objects.all()]
+    report = recorder.report("GET /")
+    assert report is not None and "auth_user" in report
+    assert "test_queries.py" not in report
+    with RequestQueries() as recorder:
+        [post.author for post in Post.objects.select_related("author")]
+    assert recorder.report("GET /") is None
+
+
+def test_client_fails_on_n_plus_one(
+        settings, monkeypatch, client, many_posts_with_published_locations):
+    settings.BLOG_QUERY_BUDGET_STRICT = False
+    monkeypatch.setattr(
+        views.IndexListView, "get_queryset",
+        lambda self: views.process_posts(use_select_related=False))
+    with pytest.raises(pytest.fail.Exception, match="N\\+1"):
+        client.get("/")
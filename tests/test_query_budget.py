@@ -0,0 +1,52 @@
+import logging
+
+import pytest
+
+from blog.querybudget import QueryBudgetExceeded
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_budget_exceeded_raises_in_strict_mode(
+        settings, client, many_posts_with_published_locations):
+    settings.BLOG_QUERY_BUDGETS = {'blog:index': (1, 1000)}
+    with pytest.raises(QueryBudgetExceeded) as error:
+        client.get('/')
+    report = str(error.value)
+    assert 'blog:index' in report and 'SELECT' in report
+    assert 'blog/' in report, (
+        'Убедитесь, что в отчёте есть стек вызовов лишних запросов.'
+    )
+    settings.BLOG_STREAMING_RENDER = True
+    response = client.get('/')
+    with pytest.raises(QueryBudgetExceeded):
+        b''.join(response.streaming_content)
+
+
+def test_budget_exceeded_logged_in_production(
+        settings, client, caplog, many_posts_with_published_locations):
+    settings.BLOG_QUERY_BUDGET_STRICT = False
+    settings.BLOG_QUERY_BUDGETS = {'blog:index': (1, 1000)}
+    with caplog.at_level(logging.WARNING, logger='blog.querybudget'):
+        assert client.get('/').status_code == 200
+    assert 'blog:index' in caplog.text, (
+        'Убедитесь, что превышение бюджета запросов пишется в журнал.'
+    )
+    caplog.clear()
+    settings.BLOG_QUERY_BUDGETS = {}
+    client.get('/')
+    assert not caplog.text
+
+
+def test_time_budget_only_logged_in_strict_mode(
+        settings, client, caplog, many_posts_with_published_locations):
+    settings.BLOG_QUERY_BUDGETS = {'blog:index': (100, 0)}
+    with caplog.at_level(logging.WARNING, logger='blog.querybudget'):
+        assert client.get('/').status_code == 200, (
+            'Убедитесь, что в строгом режиме превышение времени запросов '
+            'не вызывает ошибку.'
+        )
+    assert 'Медленный запрос' in caplog.text and 'blog/' in caplog.text, (
+        'Убедитесь, что при превышении времени в журнал пишутся стеки '
+        'вызовов самых медленных запросов.'
+    )
@@ -0,0 +1,70 @@
+import pytest
+from django.db import connections
+from django.test import Client
+
+from blog.constants import REPLICA_PIN_COOKIE
+from blog.models import Post
+from blog.routers import refresh_replicas
+
+pytestmark = [pytest.mark.django_db(transaction=True)]
+
+
+@pytest.fixture
+def replica(settings):
+    """Реплика в памяти, скопированная из тестовой базы."""
+    alias = 'replica_test'
+    default = connections['default']
+    connections[alias] = default.__class__({
+        **default.settings_dict,
+        'NAME': 'file:replica_test?mode=memory&cache=shared',
+    }, alias)
+    settings.BLOG_READ_REPLICAS = [alias]
+    yield alias
+    connections[alias].close()
+    del connections[alias]
+
+
+def test_read_views_use_replica_until_user_writes(
+        replica, user, post_with_published_location):
+    refresh_replicas()
+    Post.objects.filter(pk=post_with_published_location.pk).update(
+        title='Заголовок только в основной базе')
+    client = Client()
+    client.force_login(user)
+    url = f'/posts/{post_with_published_location.pk}/'
+    response = client.get(url)
+    assert post_with_published_location.title in response.content.decode(), (
+        'Убедитесь, что страницы блога читаются из реплики.'
+    )
+    response = client.post(f'{url}comment/', {'text': 'Комментарий'})
+    assert REPLICA_PIN_COOKIE in response.cookies
+    response = client.get(url)
+    content = response.content.decode()
+    assert 'Заголовок только в основной базе' in content
+    assert 'Комментарий' in content, (
+        'Убедитесь, что после записи пользователь читает из основной базы.'
+    )
+
+
+def test_new_post_visible_with_lagging_replica_and_page_cache(
+        settings, replica, user, published_category):
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 60
+    refresh_replicas()
+    anonymous = Client()
+    anonymous.get('/')
+    author = Client()
+    author.force_login(user)
+    response = author.post('/posts/create/', {
+        'title': 'Пост после записи',
+        'text': 'Текст',
+        'pub_date': '2020-01-01 10:00',
+        'category': published_category.id,
+        'is_published': True,
+    })
+    assert REPLICA_PIN_COOKIE in response.cookies
+    # Реплика отстаёт: анонимный запрос кеширует страницу без поста.
+    assert 'Пост после записи' not in anonymous.get('/').content.decode()
+    assert 'Пост после записи' in author.get('/').content.decode(), (
+        'Убедитесь, что после записи пользователь не получает из кеша '
+        'страницу, отрисованную из отстающей реплики.'
+    )
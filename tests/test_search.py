@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+import pytest
+from django.utils import timezone
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def make_post(mixer, user, category, title, text='Текст', **kwargs):
+    kwargs = {'is_published': True, 'pub_date': timezone.now(), **kwargs}
+    return mixer.blend(
+        'blog.Post', author=user, category=category, title=title, text=text,
+        image=None, **kwargs)
+
+
+def found_titles(client, query):
+    response = client.get('/search/', {'q': query})
+    assert response.status_code == 200
+    return [post.title for post in response.context['page_obj']]
+
+
+def test_search_ranks_and_respects_visibility(
+        mixer, user, client, published_category):
+    make_post(mixer, user, published_category, 'Про горы',
+              text='Поход по горам и озёрам')
+    make_post(mixer, user, published_category, 'Дневник',
+              text='Немного о горах и много о море')
+    make_post(mixer, user, published_category, 'Горы в тумане',
+              is_published=False)
+    make_post(mixer, user, published_category, 'Горы завтра',
+              pub_date=timezone.now() + timedelta(days=1))
+    assert found_titles(client, 'гор') == ['Про горы', 'Дневник'], (
+        'Убедитесь, что поиск находит публикации по префиксу слова, '
+        'ставит совпадения в заголовке выше и скрывает '
+        'неопубликованные и отложенные публикации.'
+    )
+    assert found_titles(client, 'море OR "') == [], (
+        'Убедитесь, что операторы FTS5 во вводе не разбираются.'
+    )
+
+
+def test_search_index_follows_changes(mixer, user, client,
+                                      published_category):
+    post = make_post(mixer, user, published_category, 'Старое название')
+    Post.objects.filter(pk=post.pk).update(title='Новое название')
+    assert found_titles(client, 'старое') == []
+    assert found_titles(client, 'новое') == ['Новое название']
+    post.delete()
+    assert found_titles(client, 'новое') == [], (
+        'Убедитесь, что индекс поиска обновляется при изменении '
+        'и удалении публикаций.'
+    )
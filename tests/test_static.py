@@ -0,0 +1,55 @@
+import gzip
+
+import pytest
+from django.core.management import call_command
+from django.http import Http404
+from django.test import RequestFactory
+
+from blog.views import StaticFileView
+
+
+@pytest.fixture
+def collected(settings, tmp_path):
+    settings.STATIC_ROOT = tmp_path
+    settings.STORAGES = {
+        **settings.STORAGES,
+        'staticfiles': {
+            'BACKEND': 'blog.storage.CompressedManifestStaticFilesStorage',
+        },
+    }
+    call_command('collectstatic', interactive=False, verbosity=0)
+    return tmp_path
+
+
+def get_static(path, accept_encoding=''):
+    request = RequestFactory().get(
+        f'/static/{path}', HTTP_ACCEPT_ENCODING=accept_encoding)
+    return StaticFileView.as_view()(request, path=path)
+
+
+def test_collectstatic_writes_hashed_compressed_css(collected):
+    hashed = list((collected / 'css').glob('bootstrap.min.*.css'))
+    assert hashed, 'Убедитесь, что Bootstrap CSS собирается с хешем в имени.'
+    compressed = hashed[0].with_name(hashed[0].name + '.gz')
+    assert gzip.decompress(compressed.read_bytes()) == hashed[0].read_bytes()
+    assert not list((collected / 'img').rglob('*.png.gz')), (
+        'Убедитесь, что изображения не сжимаются повторно.'
+    )
+
+
+def test_static_view_serves_compressed_variant(collected):
+    name = next((collected / 'css').glob('bootstrap.min.*.css')).name
+    response = get_static(f'css/{name}', 'gzip, deflate')
+    assert response['Content-Encoding'] == 'gzip'
+    assert response['Content-Type'].startswith('text/css')
+    assert 'immutable' in response['Cache-Control']
+    assert 'Accept-Encoding' in response['Vary']
+    plain = get_static(f'css/{name}', 'gzip;q=0')
+    assert not plain.has_header('Content-Encoding')
+
+
+def test_static_view_rejects_paths_outside_root(collected):
+    with pytest.raises(Http404):
+        get_static('../secret.txt')
+    assert 'immutable' not in get_static(
+        'css/bootstrap.min.css')['Cache-Control']
@@ -0,0 +1,162 @@
+from io import BytesIO, StringIO
+
+import pytest
+from PIL import Image
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+
+from blog import storage as storage_module
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+@pytest.fixture
+def storage():
+    return Post._meta.get_field('image').storage
+
+
+def jpeg_bytes():
+    image_data = BytesIO()
+    Image.new('RGB', (64, 48), color=(10, 20, 30)).save(image_data, 'JPEG')
+    return image_data.getvalue()
+
+
+def test_post_image_uses_object_storage(storage):
+    assert isinstance(storage, storage_module.ObjectStorage)
+
+
+def test_large_file_saved_in_parts(monkeypatch, storage, media_root):
+    monkeypatch.setattr(storage_module, 'MULTIPART_THRESHOLD', 10)
+    monkeypatch.setattr(storage_module, 'MULTIPART_CHUNK_SIZE', 7)
+    uploaded = []
+    upload_part = storage.client.upload_part
+
+    def spy(*args):
+        uploaded.append(args[2])
+        return upload_part(*args)
+
+    monkeypatch.setattr(storage.client, 'upload_part', spy)
+    data = bytes(range(50))
+    name = storage.save('posts_images/parts.bin', ContentFile(data))
+    assert uploaded == list(range(1, 9))
+    with storage.open(name) as file:
+        assert file.read() == data
+    assert not any((media_root / '.multipart').iterdir())
+
+
+def test_metadata_lookups_cached(monkeypatch, storage):
+    name = storage.save('posts_images/cached.bin', ContentFile(b'data'))
+    calls = []
+    head_object = storage.client.head_object
+
+    def spy(key):
+        calls.append(key)
+        return head_object(key)
+
+    monkeypatch.setattr(storage.client, 'head_object', spy)
+    assert storage.exists(name) and storage.size(name) == 4
+    assert calls == [name], (
+        'Убедитесь, что метаданные объектов кешируются.'
+    )
+    storage.delete(name)
+    assert not storage.exists(name)
+
+
+def test_limited_reader_stops_past_limit():
+    reader = storage_module.LimitedReader(BytesIO(bytes(100)), 50)
+    assert len(reader.read(30)) == 30
+    with pytest.raises(storage_module.UploadTooLarge):
+        reader.read()
+
+
+def test_direct_upload_attached_to_post(
+        user_client, published_category, storage):
+    content = jpeg_bytes()
+    response = user_client.post('/posts/image-upload-url/', data={
+        'filename': 'direct.jpg',
+        'content_type': 'image/jpeg',
+        'size': len(content),
+    })
+    assert response.status_code == 200
+    upload = response.json()
+    put_response = user_client.put(
+        upload['url'], data=content,
+        content_type=upload['headers']['Content-Type'])
+    assert put_response.status_code == 200
+    again = user_client.put(
+        upload['url'], data=b'other',
+        content_type=upload['headers']['Content-Type'])
+    assert again.status_code == 409, (
+        'Убедитесь, что ссылку для загрузки нельзя использовать повторно.'
+    )
+    user_client.post('/posts/create/', data={
+        'title': 'Прямая загрузка',
+        'text': 'Текст',
+        'pub_date': '2020-01-01 10:00',
+        'category': published_category.id,
+        'is_published': True,
+        'image_key': upload['image_key'],
+    })
+    post = Post.objects.get(title='Прямая загрузка')
+    assert post.image.name.endswith('direct.jpg')
+    assert post.image_width == 64 and not post.image_placeholder, (
+        'Убедитесь, что при сохранении формы заглушка не строится: '
+        'файл из хранилища не должен скачиваться в запросе.'
+    )
+    call_command('build_image_derivatives', stdout=StringIO())
+    post.refresh_from_db()
+    assert post.image_placeholder, (
+        'Убедитесь, что build_image_derivatives строит заглушку для '
+        'изображения, подключённого из хранилища.'
+    )
+
+
+class FakeS3Client(storage_module.LocalObjectClient):
+    """Как S3: ссылка для загрузки ведёт мимо приложения."""
+
+    def presigned_put(self, key, content_type, expires):
+        return {
+            'url': f'https://bucket.example/{key}',
+            'method': 'PUT',
+            'headers': {'Content-Type': content_type},
+        }
+
+
+def test_direct_upload_bypassing_app_attached(
+        monkeypatch, user_client, published_category, storage):
+    monkeypatch.setattr(storage, 'client', FakeS3Client())
+    content = jpeg_bytes()
+    upload = user_client.post('/posts/image-upload-url/', data={
+        'filename': 'bucket.jpg',
+        'content_type': 'image/jpeg',
+        'size': len(content),
+    }).json()
+    assert upload['url'].startswith('https://bucket.example/')
+    name = upload['url'].removeprefix('https://bucket.example/')
+    storage.client.put_object(name, BytesIO(content), 'image/jpeg')
+    response = user_client.post('/posts/create/', data={
+        'title': 'Загрузка в бакет',
+        'text': 'Текст',
+        'pub_date': '2020-01-01 10:00',
+        'category': published_category.id,
+        'is_published': True,
+        'image_key': upload['image_key'],
+    })
+    assert response.status_code == 302, (
+        'Убедитесь, что изображение, загруженное прямо в хранилище, '
+        'принимается формой публикации.'
+    )
+    assert Post.objects.get(title='Загрузка в бакет').image.name == name
+
+
+def test_tampered_upload_url_rejected(user_client):
+    response = user_client.put(
+        '/media-upload/forged/', data=b'x', content_type='image/jpeg')
+    assert response.status_code == 404
@@ -0,0 +1,53 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+pytestmark = [pytest.mark.django_db]
+
+
+def normalize(html):
+    html = re.sub(
+        r'name="csrfmiddlewaretoken" value="[^"]+"', 'csrf', html)
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+@pytest.fixture
+def detail_url(mixer, user, post_with_published_location):
+    mixer.cycle(5).blend(
+        'blog.Comment', post=post_with_published_location, author=user)
+    return f'/posts/{post_with_published_location.id}/'
+
+
+@pytest.mark.parametrize('url', ['/', 'detail'])
+def test_streamed_page_matches_rendered_page(
+        settings, user_client, detail_url, url):
+    url = detail_url if url == 'detail' else url
+    rendered = user_client.get(url).content.decode()
+    settings.BLOG_STREAMING_RENDER = True
+    response = user_client.get(url)
+    assert response.streaming
+    streamed = b''.join(response.streaming_content).decode()
+    assert normalize(streamed) == normalize(rendered), (
+        'Убедитесь, что потоковый рендеринг выводит ту же страницу.'
+    )
+
+
+def test_head_sent_before_comments_query(settings, user_client, detail_url):
+    settings.BLOG_STREAMING_RENDER = True
+    response = user_client.get(detail_url)
+    chunks = iter(response.streaming_content)
+    with CaptureQueriesContext(connection) as queries:
+        first = next(chunks).decode()
+    assert '</header>' in first and 'media-body' not in first
+    assert not any('blog_comment' in query['sql']
+                   for query in queries.captured_queries)
+    with CaptureQueriesContext(connection) as queries:
+        rest = b''.join(chunks).decode()
+    assert rest.count('media-body') == 5
+    assert any('blog_comment' in query['sql']
+               for query in queries.captured_queries), (
+        'Убедитесь, что комментарии выбираются после отправки начала '
+        'страницы.'
+    )
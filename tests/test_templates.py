@@ -0,0 +1,69 @@
+import re
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.template import engines
+from django.template.loader import render_to_string
+
+from blog.benchmarks import templates
+from blog.warmup import iter_template_names, warm_templates
+
+
+def normalize(html):
+    html = re.sub(
+        r'name="csrfmiddlewaretoken" value="[^"]+"', 'csrf', html)
+    return re.sub(r'\s+', ' ', re.sub(r'>\s+<', '><', html)).strip()
+
+
+def test_warmup_compiles_every_project_template():
+    names = [
+        name
+        for engine in engines.all()
+        for directory in engine.dirs
+        for name in iter_template_names(directory)
+    ]
+    assert 'includes/post_card.html' in names
+    assert warm_templates() == len(names), (
+        'Убедитесь, что при прогреве компилируются все шаблоны проекта.'
+    )
+
+
+def test_render_benchmark_runs_without_database():
+    results = templates.run(sizes=(3,), repeat=2)
+    assert set(results) == {'index', 'category', 'profile', 'detail'}
+    metrics = results['detail']['3']
+    assert metrics['mean_ms'] > 0 and metrics['peak_kib'] > 0
+    lines, regressed = templates.compare(
+        results, {'index': {'3': {'mean_ms': 1e6}}}, tolerance=0.2)
+    assert len(lines) == 4 and not regressed
+
+
+@pytest.mark.parametrize('authenticated', [True, False])
+def test_jinja2_templates_match_django_templates(authenticated):
+    pytest.importorskip('jinja2')
+    author, _, _ = templates.make_objects()
+    for template, url, context in templates.build_scenarios(12).values():
+        request = templates.make_request(
+            url, author if authenticated else AnonymousUser())
+        django_html = render_to_string(
+            template, context, request, using='django')
+        jinja_html = render_to_string(
+            template, context, request, using='jinja2')
+        assert normalize(django_html) == normalize(jinja_html), (
+            f'Убедитесь, что шаблон {template} для Jinja2 выводит '
+            'ту же разметку, что и шаблон Django.'
+        )
+
+
+@pytest.mark.django_db
+def test_view_renders_with_selected_engine(
+        settings, client, post_with_published_location):
+    pytest.importorskip('jinja2')
+    django_html = client.get('/').content.decode()
+    settings.BLOG_TEMPLATE_ENGINES = {'blog:index': 'jinja2'}
+    response = client.get('/')
+    assert not response.templates, (
+        'Убедитесь, что страница рендерится движком из '
+        'BLOG_TEMPLATE_ENGINES.'
+    )
+    assert normalize(response.content.decode()) == normalize(django_html)
@@ -0,0 +1,132 @@
+import struct
+import tracemalloc
+import zlib
+from io import BytesIO
+
+import pytest
+from PIL import Image
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files import uploadhandler
+from django.core.files.uploadhandler import SkipFile, StopFutureHandlers
+from django.test import RequestFactory
+from django.urls import resolve
+
+from blog.uploadhandlers import PostImageUploadHandler
+
+CHUNK_SIZE = 64 * 1024
+
+
+def jpeg_bytes(size=(100, 100)):
+    image_data = BytesIO()
+    Image.new('RGB', size).save(image_data, 'JPEG')
+    return image_data.getvalue()
+
+
+def png_header(width, height):
+    """Заголовок PNG с заданными размерами и началом блока данных."""
+    ihdr = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    return (
+        b'\x89PNG\r\n\x1a\n'
+        + struct.pack('>I', len(ihdr)) + b'IHDR' + ihdr
+        + struct.pack('>I', zlib.crc32(b'IHDR' + ihdr))
+        + struct.pack('>I', CHUNK_SIZE) + b'IDAT'
+    )
+
+
+def make_handler():
+    request = RequestFactory().post('/posts/create/')
+    request.resolver_match = resolve('/posts/create/')
+    handler = PostImageUploadHandler(request)
+    with pytest.raises(StopFutureHandlers):
+        handler.new_file('image', 'big.jpg', 'image/jpeg', None)
+    return handler
+
+
+def stream(handler, first_chunk, total_size):
+    """Передача обработчику total_size байт кусками по CHUNK_SIZE."""
+    filler = bytes(CHUNK_SIZE)
+    handler.receive_data_chunk(first_chunk, 0)
+    sent = len(first_chunk)
+    while sent < total_size:
+        handler.receive_data_chunk(filler, sent)
+        sent += len(filler)
+    return sent
+
+
+def test_upload_aborted_at_byte_limit_with_bounded_memory(settings):
+    settings.POST_IMAGE_MAX_BYTES = 1024 * 1024
+    handler = make_handler()
+    tracemalloc.start()
+    try:
+        with pytest.raises(SkipFile):
+            stream(handler, jpeg_bytes(), total_size=100 * 1024 * 1024)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert handler.received <= settings.POST_IMAGE_MAX_BYTES + CHUNK_SIZE, (
+        'Убедитесь, что загрузка прерывается сразу после превышения лимита.'
+    )
+    assert peak < 2 * 1024 * 1024, (
+        'Убедитесь, что загружаемое изображение не накапливается в памяти.'
+    )
+    assert 'image' in handler.request.upload_errors
+
+
+def test_upload_aborted_by_pixel_count_in_header(settings):
+    settings.POST_IMAGE_MAX_PIXELS = 10_000
+    handler = make_handler()
+    with pytest.raises(SkipFile):
+        handler.receive_data_chunk(png_header(200, 200), 0)
+    assert handler.received < CHUNK_SIZE
+
+
+def test_decompression_bomb_rejected_before_decoding():
+    handler = make_handler()
+    with pytest.raises(SkipFile):
+        handler.receive_data_chunk(png_header(100_000, 100_000), 0)
+
+
+@pytest.mark.django_db
+def test_oversized_upload_shows_form_error(
+        settings, tmp_path, user_client, published_category):
+    settings.MEDIA_ROOT = tmp_path
+    settings.POST_IMAGE_MAX_BYTES = 1024
+    response = user_client.post('/posts/create/', data={
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'pub_date': '2020-01-01 10:00',
+        'category': published_category.id,
+        'is_published': True,
+        'image': SimpleUploadedFile(
+            'big.jpg', jpeg_bytes((400, 400)), content_type='image/jpeg'),
+    })
+    assert response.status_code == 200
+    assert 'image' in response.context['form'].errors, (
+        'Убедитесь, что при превышении размера изображения форма '
+        'сообщает об ошибке, а публикация не создаётся.'
+    )
+
+
+@pytest.mark.django_db
+def test_image_upload_opens_one_temporary_file(
+        monkeypatch, user_client, published_category):
+    opened = []
+
+    class CountingFile(uploadhandler.TemporaryUploadedFile):
+        def __init__(self, *args, **kwargs):
+            opened.append(args[0])
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(uploadhandler, 'TemporaryUploadedFile', CountingFile)
+    user_client.post('/posts/create/', data={
+        'title': 'Заголовок',
+        'text': 'Текст',
+        'pub_date': '2020-01-01 10:00',
+        'category': published_category.id,
+        'is_published': True,
+        'image': SimpleUploadedFile(
+            'one.jpg', jpeg_bytes(), content_type='image/jpeg'),
+    })
+    assert opened == ['one.jpg'], (
+        'Убедитесь, что изображение пишется в один временный файл.'
+    )
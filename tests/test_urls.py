@@ -0,0 +1,32 @@
+import pytest
+from django.urls import reverse
+
+from blog.models import Category, Comment, Post, User
+from blog.utils import fast_reverse
+
+
+@pytest.mark.parametrize('viewname, args', [
+    ('blog:index', []),
+    ('blog:post_detail', [42]),
+    ('blog:category_posts', ['travel-notes_2']),
+    ('blog:profile', ['user.name@mail+1']),
+    ('blog:edit_comment', [7, 13]),
+])
+def test_fast_reverse_matches_reverse(viewname, args):
+    assert fast_reverse(viewname, *args) == reverse(viewname, args=args), (
+        'Убедитесь, что быстрый reverse возвращает тот же адрес.'
+    )
+
+
+def test_model_urls():
+    user = User(username='author')
+    post = Post(pk=3, author=user)
+    comment = Comment(pk=5, post=post, author=user)
+    assert user.get_absolute_url() == '/profile/author/'
+    assert Category(slug='travel').get_absolute_url() == '/category/travel/'
+    assert post.get_absolute_url() == '/posts/3/'
+    assert post.edit_url == '/posts/3/edit/'
+    assert post.delete_url == '/posts/3/delete/'
+    assert comment.get_absolute_url() == '/posts/3/#comment_5'
+    assert comment.edit_url == '/posts/3/edit_comment/5/'
+    assert comment.delete_url == '/posts/3/delete_comment/5/'
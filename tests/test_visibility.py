@@ -0,0 +1,73 @@
+import io
+
+import pytest
+from django.core.management import call_command
+from django.db import DatabaseError, connection, models
+from django.test.utils import CaptureQueriesContext
+
+from blog.models import Category, Location, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_unpublishing_updates_posts_in_one_query(
+        client, post_with_published_location):
+    post = post_with_published_location
+    category, location = post.category, post.location
+    category.is_published = False
+    with CaptureQueriesContext(connection) as queries:
+        category.save()
+    assert sum(query['sql'].startswith('UPDATE "blog_post"')
+               for query in queries.captured_queries) == 1, (
+        'Убедитесь, что видимость публикаций категории пересчитывается '
+        'одним запросом UPDATE.'
+    )
+    assert not Post.objects.get(pk=post.pk).is_visible
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get('/')
+    assert post.title not in response.content.decode()
+    assert not any('"blog_category"."is_published"' in query['sql']
+                   for query in queries.captured_queries), (
+        'Убедитесь, что лента не проверяет публикацию категории через JOIN.'
+    )
+    category.is_published = True
+    category.save()
+    location.is_published = False
+    location.save()
+    post = Post.objects.get(pk=post.pk)
+    assert post.is_visible and post.visible_location is None
+    response = client.get(f'/posts/{post.pk}/')
+    assert location.name not in response.content.decode()
+
+
+def test_failed_save_keeps_post_flags(
+        monkeypatch, post_with_published_location):
+    post = post_with_published_location
+    category, location = post.category, post.location
+
+    def failing_save(*args, **kwargs):
+        raise DatabaseError
+
+    monkeypatch.setattr(models.Model, 'save', failing_save)
+    category.is_published = location.is_published = False
+    for instance in (category, location):
+        with pytest.raises(DatabaseError):
+            instance.save()
+    post = Post.objects.get(pk=post.pk)
+    assert post.is_visible and post.visible_location == location, (
+        'Убедитесь, что флаги публикаций пересчитываются в одной '
+        'транзакции с сохранением категории и местоположения.'
+    )
+
+
+def test_bulk_loaded_posts_get_visibility():
+    call_command(
+        'generate_blog_data', users=3, categories=10, locations=10, posts=50,
+        comments=0, unpublished_share=0.3, stdout=io.StringIO())
+    hidden = Category.objects.filter(is_published=False)
+    assert Post.objects.filter(is_published=True, category__in=hidden).exists()
+    assert set(Post.objects.filter(is_visible=True)) == set(
+        Post.objects.filter(is_published=True).exclude(category__in=hidden))
+    assert set(Post.objects.exclude(visible_location=None)) == set(
+        Post.objects.filter(location__in=Location.objects.filter(
+            is_published=True)))